@@ -1,60 +1,121 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
-from app import models, schemas
+from typing import List, Union
+from app.database import get_db, run_db
+from app import crud, models, sandbox, schemas
+from app.cache import cached_response
+from app.catalog import publish_write, run_read
+from app.pagination import next_cursor_headers
+from app.projection import batch_item_schema, batch_results, parse_fields, projected_schema
+from app.serialization import encode, query_fields, response_encoder
+from app.streaming import ndjson_response
 
 router = APIRouter()
 
-@router.get("/", response_model=List[schemas.Algorithm])
-def get_algorithms(skip: int = 0, limit: int = 100, category: str = None, db: Session = Depends(get_db)):
-    query = db.query(models.Algorithm)
-    if category:
-        query = query.filter(models.Algorithm.category == category)
-    algorithms = query.offset(skip).limit(limit).all()
-    return algorithms
+@router.get("/", response_model=Union[List[schemas.Algorithm], List[schemas.AlgorithmSummary]])
+async def get_algorithms(request: Request, skip: int = 0, limit: int = 100, category: str = None, cursor: str = None, summary: bool = False, fields: str = None, db: Session = Depends(get_db)):
+    field_names = parse_fields(fields, schemas.Algorithm)
+    if summary and field_names is None:
+        columns, encoder = crud.ALGORITHM_SUMMARY_FIELDS, response_encoder(schemas.AlgorithmSummary, None, many=True)
+    else:
+        columns, encoder = query_fields(schemas.Algorithm, field_names), response_encoder(schemas.Algorithm, field_names, many=True)
+
+    async def load():
+        return await run_read(db, crud.get_algorithms, skip, limit, category, cursor, columns)
+
+    params = {"skip": skip, "limit": limit, "cursor": cursor, "category": category, "summary": summary, "fields": field_names}
+    return await cached_response(request, "algorithms.list", params, ("algorithms",), encoder, load,
+                                 lambda rows: next_cursor_headers(rows, limit, crud.ALGORITHM_CURSOR))
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_algorithms(category: str = None, fields: str = None):
+    # Streams NDJSON in id order; memory stays flat however large the table is
+    field_names = parse_fields(fields, schemas.Algorithm) or crud.ALGORITHM_FIELDS
+    return ndjson_response(crud.iter_algorithms, field_names, category)
 
 @router.get("/{algorithm_id}", response_model=schemas.Algorithm)
-def get_algorithm(algorithm_id: int, db: Session = Depends(get_db)):
-    algorithm = db.query(models.Algorithm).filter(models.Algorithm.id == algorithm_id).first()
-    if algorithm is None:
-        raise HTTPException(status_code=404, detail="Algorithm not found")
-    return algorithm
+async def get_algorithm(request: Request, algorithm_id: int, fields: str = None, db: Session = Depends(get_db)):
+    field_names = parse_fields(fields, schemas.Algorithm)
+    columns = query_fields(schemas.Algorithm, field_names)
+
+    async def load():
+        algorithm = await run_read(db, crud.get_algorithm, algorithm_id, columns)
+        if algorithm is None:
+            raise HTTPException(status_code=404, detail="Algorithm not found")
+        return algorithm
+
+    params = {"algorithm_id": algorithm_id, "fields": field_names}
+    return await cached_response(request, "algorithms.id", params, ("algorithms",), response_encoder(schemas.Algorithm, field_names), load)
 
 @router.get("/slug/{slug}", response_model=schemas.Algorithm)
-def get_algorithm_by_slug(slug: str, db: Session = Depends(get_db)):
-    algorithm = db.query(models.Algorithm).filter(models.Algorithm.slug == slug).first()
-    if algorithm is None:
-        raise HTTPException(status_code=404, detail="Algorithm not found")
-    return algorithm
+async def get_algorithm_by_slug(request: Request, slug: str, fields: str = None, db: Session = Depends(get_db)):
+    field_names = parse_fields(fields, schemas.Algorithm)
+    columns = query_fields(schemas.Algorithm, field_names)
+
+    async def load():
+        algorithm = await run_read(db, crud.get_algorithm_by_slug, slug, columns)
+        if algorithm is None:
+            raise HTTPException(status_code=404, detail="Algorithm not found")
+        return algorithm
+
+    params = {"slug": slug, "fields": field_names}
+    return await cached_response(request, "algorithms.slug", params, ("algorithms",), response_encoder(schemas.Algorithm, field_names), load)
+
+@router.post("/batch")
+async def get_algorithms_batch(lookup: schemas.BatchLookup, fields: str = None, db: Session = Depends(get_db)):
+    field_names = parse_fields(fields, schemas.Algorithm)
+    rows = await run_read(db, crud.get_algorithms_by_keys, lookup.key, lookup.values, field_names)
+    item_schema = batch_item_schema(projected_schema(schemas.Algorithm, field_names))
+    return Response(content=encode(List[item_schema], batch_results(rows, lookup.key, lookup.values)), media_type="application/json")
 
 @router.post("/", response_model=schemas.Algorithm)
-def create_algorithm(algorithm: schemas.AlgorithmCreate, db: Session = Depends(get_db)):
-    db_algorithm = models.Algorithm(**algorithm.dict())
-    db.add(db_algorithm)
-    db.commit()
-    db.refresh(db_algorithm)
+async def create_algorithm(algorithm: schemas.AlgorithmCreate, db: Session = Depends(get_db)):
+    db_algorithm = await run_db(db, crud.create_algorithm, algorithm)
+    await publish_write("algorithms")
     return db_algorithm
 
+@router.post("/bulk", response_model=List[schemas.BulkResult])
+async def bulk_create_algorithms(algorithms: List[schemas.AlgorithmCreate], db: Session = Depends(get_db)):
+    results, errors = await run_db(db, crud.bulk_write, models.Algorithm, algorithms, False)
+    if errors:
+        raise HTTPException(status_code=409, detail=errors)
+    await publish_write("algorithms")
+    return results
+
+@router.post("/bulk/upsert", response_model=List[schemas.BulkResult])
+async def bulk_upsert_algorithms(algorithms: List[schemas.AlgorithmCreate], db: Session = Depends(get_db)):
+    results, errors = await run_db(db, crud.bulk_write, models.Algorithm, algorithms, True)
+    if errors:
+        raise HTTPException(status_code=409, detail=errors)
+    await publish_write("algorithms")
+    return results
+
+@router.post("/{slug}/run", response_model=schemas.AlgorithmRunResult)
+async def run_algorithm(slug: str, run: schemas.AlgorithmRun, db: Session = Depends(get_db)):
+    algorithm = await run_read(db, crud.get_algorithm_by_slug, slug, ("python_code",))
+    if algorithm is None:
+        raise HTTPException(status_code=404, detail="Algorithm not found")
+    if not algorithm.python_code:
+        raise HTTPException(status_code=422, detail="Algorithm has no Python code")
+    try:
+        return await sandbox.pool.run(slug, algorithm.python_code, run.args, run.kwargs)
+    except SyntaxError as exc:
+        raise HTTPException(status_code=422, detail=f"Stored Python code does not compile: {exc}")
+    except sandbox.SandboxUnavailable as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+
 @router.put("/{algorithm_id}", response_model=schemas.Algorithm)
-def update_algorithm(algorithm_id: int, algorithm: schemas.AlgorithmCreate, db: Session = Depends(get_db)):
-    db_algorithm = db.query(models.Algorithm).filter(models.Algorithm.id == algorithm_id).first()
+async def update_algorithm(algorithm_id: int, algorithm: schemas.AlgorithmCreate, db: Session = Depends(get_db)):
+    db_algorithm = await run_db(db, crud.update_algorithm, algorithm_id, algorithm)
     if db_algorithm is None:
         raise HTTPException(status_code=404, detail="Algorithm not found")
-    
-    for key, value in algorithm.dict().items():
-        setattr(db_algorithm, key, value)
-    
-    db.commit()
-    db.refresh(db_algorithm)
+    await publish_write("algorithms")
     return db_algorithm
 
 @router.delete("/{algorithm_id}")
-def delete_algorithm(algorithm_id: int, db: Session = Depends(get_db)):
-    db_algorithm = db.query(models.Algorithm).filter(models.Algorithm.id == algorithm_id).first()
-    if db_algorithm is None:
+async def delete_algorithm(algorithm_id: int, db: Session = Depends(get_db)):
+    if not await run_db(db, crud.delete_algorithm, algorithm_id):
         raise HTTPException(status_code=404, detail="Algorithm not found")
-    
-    db.delete(db_algorithm)
-    db.commit()
+    await publish_write("algorithms")
     return {"message": "Algorithm deleted successfully"}
@@ -1,57 +1,107 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
-from app.database import get_db
-from app import models, schemas
+from app.database import get_db, run_db
+from app import crud, models, schemas
+from app.cache import cached_response
+from app.catalog import publish_write, run_read
+from app.pagination import next_cursor_headers
+from app.projection import batch_item_schema, batch_results, parse_fields, projected_schema
+from app.serialization import encode, query_fields, response_encoder, schema_encoder
 
 router = APIRouter()
 
 @router.get("/", response_model=List[schemas.Category])
-def get_categories(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    categories = db.query(models.Category).order_by(models.Category.order).offset(skip).limit(limit).all()
-    return categories
+async def get_categories(request: Request, skip: int = 0, limit: int = 100, cursor: str = None, fields: str = None, db: Session = Depends(get_db)):
+    field_names = parse_fields(fields, schemas.Category)
+    columns = query_fields(schemas.Category, field_names)
+
+    async def load():
+        return await run_read(db, crud.get_categories, skip, limit, cursor, columns)
+
+    params = {"skip": skip, "limit": limit, "cursor": cursor, "fields": field_names}
+    return await cached_response(request, "categories.list", params, ("categories",), response_encoder(schemas.Category, field_names, many=True), load,
+                                 lambda rows: next_cursor_headers(rows, limit, crud.CATEGORY_CURSOR))
 
 @router.get("/{category_id}", response_model=schemas.Category)
-def get_category(category_id: int, db: Session = Depends(get_db)):
-    category = db.query(models.Category).filter(models.Category.id == category_id).first()
-    if category is None:
-        raise HTTPException(status_code=404, detail="Category not found")
-    return category
+async def get_category(request: Request, category_id: int, fields: str = None, db: Session = Depends(get_db)):
+    field_names = parse_fields(fields, schemas.Category)
+    columns = query_fields(schemas.Category, field_names)
+
+    async def load():
+        category = await run_read(db, crud.get_category, category_id, columns)
+        if category is None:
+            raise HTTPException(status_code=404, detail="Category not found")
+        return category
+
+    params = {"category_id": category_id, "fields": field_names}
+    return await cached_response(request, "categories.id", params, ("categories",), response_encoder(schemas.Category, field_names), load)
 
 @router.get("/slug/{slug}", response_model=schemas.Category)
-def get_category_by_slug(slug: str, db: Session = Depends(get_db)):
-    category = db.query(models.Category).filter(models.Category.slug == slug).first()
-    if category is None:
-        raise HTTPException(status_code=404, detail="Category not found")
-    return category
+async def get_category_by_slug(request: Request, slug: str, fields: str = None, db: Session = Depends(get_db)):
+    field_names = parse_fields(fields, schemas.Category)
+    columns = query_fields(schemas.Category, field_names)
+
+    async def load():
+        category = await run_read(db, crud.get_category_by_slug, slug, columns)
+        if category is None:
+            raise HTTPException(status_code=404, detail="Category not found")
+        return category
+
+    params = {"slug": slug, "fields": field_names}
+    return await cached_response(request, "categories.slug", params, ("categories",), response_encoder(schemas.Category, field_names), load)
+
+@router.get("/slug/{slug}/full", response_model=schemas.CategoryPage)
+async def get_category_page(request: Request, slug: str, db: Session = Depends(get_db)):
+    async def load():
+        category = await run_read(db, crud.get_category_page, slug)
+        if category is None:
+            raise HTTPException(status_code=404, detail="Category not found")
+        return category
+
+    tags = ("categories", "examples", "algorithms")
+    return await cached_response(request, "categories.page", {"slug": slug}, tags, schema_encoder(schemas.CategoryPage), load)
+
+@router.post("/batch")
+async def get_categories_batch(lookup: schemas.BatchLookup, fields: str = None, db: Session = Depends(get_db)):
+    field_names = parse_fields(fields, schemas.Category)
+    rows = await run_read(db, crud.get_categories_by_keys, lookup.key, lookup.values, field_names)
+    item_schema = batch_item_schema(projected_schema(schemas.Category, field_names))
+    return Response(content=encode(List[item_schema], batch_results(rows, lookup.key, lookup.values)), media_type="application/json")
 
 @router.post("/", response_model=schemas.Category)
-def create_category(category: schemas.CategoryCreate, db: Session = Depends(get_db)):
-    db_category = models.Category(**category.dict())
-    db.add(db_category)
-    db.commit()
-    db.refresh(db_category)
+async def create_category(category: schemas.CategoryCreate, db: Session = Depends(get_db)):
+    db_category = await run_db(db, crud.create_category, category)
+    await publish_write("categories")
     return db_category
 
+@router.post("/bulk", response_model=List[schemas.BulkResult])
+async def bulk_create_categories(categories: List[schemas.CategoryCreate], db: Session = Depends(get_db)):
+    results, errors = await run_db(db, crud.bulk_write, models.Category, categories, False)
+    if errors:
+        raise HTTPException(status_code=409, detail=errors)
+    await publish_write("categories")
+    return results
+
+@router.post("/bulk/upsert", response_model=List[schemas.BulkResult])
+async def bulk_upsert_categories(categories: List[schemas.CategoryCreate], db: Session = Depends(get_db)):
+    results, errors = await run_db(db, crud.bulk_write, models.Category, categories, True)
+    if errors:
+        raise HTTPException(status_code=409, detail=errors)
+    await publish_write("categories")
+    return results
+
 @router.put("/{category_id}", response_model=schemas.Category)
-def update_category(category_id: int, category: schemas.CategoryCreate, db: Session = Depends(get_db)):
-    db_category = db.query(models.Category).filter(models.Category.id == category_id).first()
+async def update_category(category_id: int, category: schemas.CategoryCreate, db: Session = Depends(get_db)):
+    db_category = await run_db(db, crud.update_category, category_id, category)
     if db_category is None:
         raise HTTPException(status_code=404, detail="Category not found")
-    
-    for key, value in category.dict().items():
-        setattr(db_category, key, value)
-    
-    db.commit()
-    db.refresh(db_category)
+    await publish_write("categories")
     return db_category
 
 @router.delete("/{category_id}")
-def delete_category(category_id: int, db: Session = Depends(get_db)):
-    db_category = db.query(models.Category).filter(models.Category.id == category_id).first()
-    if db_category is None:
+async def delete_category(category_id: int, db: Session = Depends(get_db)):
+    if not await run_db(db, crud.delete_category, category_id):
         raise HTTPException(status_code=404, detail="Category not found")
-    
-    db.delete(db_category)
-    db.commit()
+    await publish_write("categories")
     return {"message": "Category deleted successfully"}
@@ -1,60 +1,107 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
-from app import models, schemas
+from typing import List, Union
+from app.database import get_db, run_db
+from app import crud, models, schemas
+from app.cache import cached_response
+from app.catalog import publish_write, run_read
+from app.pagination import next_cursor_headers
+from app.projection import batch_item_schema, batch_results, parse_fields, projected_schema
+from app.serialization import encode, query_fields, response_encoder
+from app.streaming import ndjson_response
 
 router = APIRouter()
 
-@router.get("/", response_model=List[schemas.Example])
-def get_examples(skip: int = 0, limit: int = 100, category_id: int = None, db: Session = Depends(get_db)):
-    query = db.query(models.Example)
-    if category_id:
-        query = query.filter(models.Example.category_id == category_id)
-    examples = query.offset(skip).limit(limit).all()
-    return examples
+@router.get("/", response_model=Union[List[schemas.Example], List[schemas.ExampleSummary]])
+async def get_examples(request: Request, skip: int = 0, limit: int = 100, category_id: int = None, cursor: str = None, summary: bool = False, fields: str = None, db: Session = Depends(get_db)):
+    field_names = parse_fields(fields, schemas.Example)
+    if summary and field_names is None:
+        columns, encoder = crud.EXAMPLE_SUMMARY_FIELDS, response_encoder(schemas.ExampleSummary, None, many=True)
+    else:
+        columns, encoder = query_fields(schemas.Example, field_names), response_encoder(schemas.Example, field_names, many=True)
+
+    async def load():
+        return await run_read(db, crud.get_examples, skip, limit, category_id, cursor, columns)
+
+    params = {"skip": skip, "limit": limit, "cursor": cursor, "category_id": category_id, "summary": summary, "fields": field_names}
+    return await cached_response(request, "examples.list", params, ("examples",), encoder, load,
+                                 lambda rows: next_cursor_headers(rows, limit, crud.EXAMPLE_CURSOR))
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_examples(category_id: int = None, fields: str = None):
+    # Streams NDJSON in id order; memory stays flat however large the table is
+    field_names = parse_fields(fields, schemas.Example) or crud.EXAMPLE_FIELDS
+    return ndjson_response(crud.iter_examples, field_names, category_id)
 
 @router.get("/{example_id}", response_model=schemas.Example)
-def get_example(example_id: int, db: Session = Depends(get_db)):
-    example = db.query(models.Example).filter(models.Example.id == example_id).first()
-    if example is None:
-        raise HTTPException(status_code=404, detail="Example not found")
-    return example
+async def get_example(request: Request, example_id: int, fields: str = None, db: Session = Depends(get_db)):
+    field_names = parse_fields(fields, schemas.Example)
+    columns = query_fields(schemas.Example, field_names)
+
+    async def load():
+        example = await run_read(db, crud.get_example, example_id, columns)
+        if example is None:
+            raise HTTPException(status_code=404, detail="Example not found")
+        return example
+
+    params = {"example_id": example_id, "fields": field_names}
+    return await cached_response(request, "examples.id", params, ("examples",), response_encoder(schemas.Example, field_names), load)
 
 @router.get("/slug/{slug}", response_model=schemas.Example)
-def get_example_by_slug(slug: str, db: Session = Depends(get_db)):
-    example = db.query(models.Example).filter(models.Example.slug == slug).first()
-    if example is None:
-        raise HTTPException(status_code=404, detail="Example not found")
-    return example
+async def get_example_by_slug(request: Request, slug: str, fields: str = None, db: Session = Depends(get_db)):
+    field_names = parse_fields(fields, schemas.Example)
+    columns = query_fields(schemas.Example, field_names)
+
+    async def load():
+        example = await run_read(db, crud.get_example_by_slug, slug, columns)
+        if example is None:
+            raise HTTPException(status_code=404, detail="Example not found")
+        return example
+
+    params = {"slug": slug, "fields": field_names}
+    return await cached_response(request, "examples.slug", params, ("examples",), response_encoder(schemas.Example, field_names), load)
+
+@router.post("/batch")
+async def get_examples_batch(lookup: schemas.BatchLookup, fields: str = None, db: Session = Depends(get_db)):
+    field_names = parse_fields(fields, schemas.Example)
+    rows = await run_read(db, crud.get_examples_by_keys, lookup.key, lookup.values, field_names)
+    item_schema = batch_item_schema(projected_schema(schemas.Example, field_names))
+    return Response(content=encode(List[item_schema], batch_results(rows, lookup.key, lookup.values)), media_type="application/json")
 
 @router.post("/", response_model=schemas.Example)
-def create_example(example: schemas.ExampleCreate, db: Session = Depends(get_db)):
-    db_example = models.Example(**example.dict())
-    db.add(db_example)
-    db.commit()
-    db.refresh(db_example)
+async def create_example(example: schemas.ExampleCreate, db: Session = Depends(get_db)):
+    db_example = await run_db(db, crud.create_example, example)
+    await publish_write("examples")
     return db_example
 
+@router.post("/bulk", response_model=List[schemas.BulkResult])
+async def bulk_create_examples(examples: List[schemas.ExampleCreate], db: Session = Depends(get_db)):
+    results, errors = await run_db(db, crud.bulk_write, models.Example, examples, False)
+    if errors:
+        raise HTTPException(status_code=409, detail=errors)
+    await publish_write("examples")
+    return results
+
+@router.post("/bulk/upsert", response_model=List[schemas.BulkResult])
+async def bulk_upsert_examples(examples: List[schemas.ExampleCreate], db: Session = Depends(get_db)):
+    results, errors = await run_db(db, crud.bulk_write, models.Example, examples, True)
+    if errors:
+        raise HTTPException(status_code=409, detail=errors)
+    await publish_write("examples")
+    return results
+
 @router.put("/{example_id}", response_model=schemas.Example)
-def update_example(example_id: int, example: schemas.ExampleCreate, db: Session = Depends(get_db)):
-    db_example = db.query(models.Example).filter(models.Example.id == example_id).first()
+async def update_example(example_id: int, example: schemas.ExampleCreate, db: Session = Depends(get_db)):
+    db_example = await run_db(db, crud.update_example, example_id, example)
     if db_example is None:
         raise HTTPException(status_code=404, detail="Example not found")
-    
-    for key, value in example.dict().items():
-        setattr(db_example, key, value)
-    
-    db.commit()
-    db.refresh(db_example)
+    await publish_write("examples")
     return db_example
 
 @router.delete("/{example_id}")
-def delete_example(example_id: int, db: Session = Depends(get_db)):
-    db_example = db.query(models.Example).filter(models.Example.id == example_id).first()
-    if db_example is None:
+async def delete_example(example_id: int, db: Session = Depends(get_db)):
+    if not await run_db(db, crud.delete_example, example_id):
         raise HTTPException(status_code=404, detail="Example not found")
-    
-    db.delete(db_example)
-    db.commit()
+    await publish_write("examples")
     return {"message": "Example deleted successfully"}
@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.orm import Session
+from typing import List
+from app.database import get_db, run_db
+from app import schemas, search
+from app.cache import cached_response
+from app.serialization import schema_encoder
+
+router = APIRouter()
+
+@router.get("/", response_model=List[schemas.SearchResult])
+async def search_catalog(request: Request, q: str = Query(..., min_length=1), kind: schemas.SearchKind = Query(None, alias="type"), limit: int = Query(20, ge=1, le=100), db: Session = Depends(get_db)):
+    kind = kind.value if kind else None
+
+    async def load():
+        return await run_db(db, search.search, q, kind, limit)
+
+    params = {"q": q, "type": kind, "limit": limit}
+    return await cached_response(request, "search", params, ("algorithms", "examples"), schema_encoder(List[schemas.SearchResult]), load)
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.orm import Session
+from app.database import get_db, run_db
+from app import schemas, sync
+from app.cache import cached_response
+from app.serialization import schema_encoder
+
+router = APIRouter()
+
+@router.get("/", response_model=schemas.SyncChanges)
+async def sync_changes(request: Request, since: int = Query(0, ge=0), limit: int = Query(1000, ge=1, le=5000), db: Session = Depends(get_db)):
+    async def load():
+        return await run_db(db, sync.changes, since, limit)
+
+    params = {"since": since, "limit": limit}
+    return await cached_response(request, "sync", params, tuple(sync.SYNC_MODELS), schema_encoder(schemas.SyncChanges), load)
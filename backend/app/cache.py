@@ -0,0 +1,197 @@
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from fastapi import Request, Response
+from starlette.concurrency import run_in_threadpool
+
+from app import config
+from app.compression import compressed_body, negotiate
+
+
+class ResponseCache:
+    """Size-bounded LRU cache with TTL for encoded catalog responses.
+
+    Every entry is tagged with the tables it was built from; write handlers
+    call ``invalidate`` with the table name to drop exactly those entries and
+    bump the table's version, so a build racing the write isn't cached.
+    """
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, tags, value)
+        self._generations = defaultdict(int)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def generation(self, tags):
+        with self._lock:
+            return tuple(self._generations[tag] for tag in tags)
+
+    def set(self, key, value, tags, generation):
+        with self._lock:
+            # A write landed while the value was being built; it may be stale.
+            if tuple(self._generations[tag] for tag in tags) != generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, frozenset(tags), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, tag):
+        with self._lock:
+            self._generations[tag] += 1
+            stale = [key for key, entry in self._entries.items() if tag in entry[1]]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            for tag in list(self._generations):
+                self._generations[tag] += 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+response_cache = ResponseCache(config.CACHE_MAX_ENTRIES, config.CACHE_TTL_SECONDS)
+
+
+class SingleFlight:
+    """Shares one in-flight build between concurrent requests for the same key.
+
+    The build runs as its own task, so a leader whose client disconnects
+    doesn't cancel it for the followers waiting on it. Errors (e.g. a 404)
+    are shared the same way as results.
+    """
+
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self._inflight = {}
+        self.loads = 0
+        self.coalesced = 0
+
+    async def do(self, key, build):
+        if not self.enabled:
+            self.loads += 1
+            return await build()
+        task = self._inflight.get(key)
+        if task is None:
+            self.loads += 1
+            task = asyncio.ensure_future(build())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def stats(self):
+        requests = self.loads + self.coalesced
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._inflight),
+            "loads": self.loads,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": self.coalesced / requests if requests else 0.0,
+        }
+
+
+single_flight = SingleFlight(config.SINGLE_FLIGHT)
+
+def make_etag(body, headers):
+    # From the content itself: table versions are per process and miss writes
+    # made by other workers or straight to the database (imports, seeding)
+    digest = hashlib.blake2b(body, digest_size=16)
+    for name, value in sorted(headers.items()):
+        digest.update(f"\n{name}: {value}".encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(request: Request, etag):
+    """Weak comparison of ``If-None-Match`` with the ETag of the representation being sent."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = {value.strip().removeprefix("W/") for value in header.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+async def cached_response(request: Request, route, params, tags, encoder, loader, extra_headers=None):
+    """Serve ``route`` from the response cache, awaiting ``loader()`` on a miss.
+
+    ``encoder`` turns the loaded data into the JSON body (see
+    ``app.serialization``). The ETag is a hash of the body and its headers,
+    computed once per cache entry, so it changes whenever a refill finds
+    different content and a matching ``If-None-Match`` gets a 304.
+    ``extra_headers(data)`` may add headers computed from the loaded data;
+    they are cached with the body, as are its gzip/brotli encodings, so a
+    body is compressed at most once per coding and version. Concurrent
+    misses for the same key and version wait on a single ``loader()``.
+    """
+    key = (route, tuple(sorted(params.items())))
+    generation = response_cache.generation(tags)
+    entry = response_cache.get(key)
+    if entry is None:
+        async def build():
+            data = await loader()
+            body = encoder(data)
+            built_headers = extra_headers(data) if extra_headers else {}
+            entry = (body, built_headers, {}, make_etag(body, built_headers))
+            response_cache.set(key, entry, tags, generation)
+            return entry
+
+        # Identical misses for the same version share one load and encode
+        entry = await single_flight.do((key, generation), build)
+    body, cached_headers, variants, etag = entry
+    # Pick the representation first: a 304 must carry the ETag its 200 would have
+    coding = negotiate(request.headers.get("accept-encoding"))
+    if coding is not None and len(body) < config.COMPRESSION_MIN_SIZE:
+        coding = None
+    if coding is not None:
+        # Compressed representations carry the coding in their ETag
+        etag = f'{etag[:-1]}-{coding}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    headers.update(cached_headers)
+    if coding is not None:
+        if coding in variants:
+            body = compressed_body(variants, body, coding)
+        else:
+            # Large bodies take long enough to compress to stall every other request
+            body = await run_in_threadpool(compressed_body, variants, body, coding)
+        headers["Content-Encoding"] = coding
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,273 @@
+import bisect
+import sys
+import threading
+import time
+from collections import namedtuple
+from functools import lru_cache
+from operator import attrgetter
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from app import config, models, schemas
+from app.cache import response_cache
+from app.database import SessionLocal, run_db
+from app.pagination import decode_cursor
+
+# Compact, tuple-backed rows in schema field order
+CategoryRow = namedtuple("CategoryRow", schemas.Category.model_fields)
+ExampleRow = namedtuple("ExampleRow", schemas.Example.model_fields)
+AlgorithmRow = namedtuple("AlgorithmRow", schemas.Algorithm.model_fields)
+
+
+@lru_cache(maxsize=256)
+def _projection(row_type, fields, required):
+    """Row type and getter for ``fields`` plus ``required`` columns, like ``select_fields``."""
+    names = tuple(fields) + tuple(name for name in required if name not in fields)
+    projected = namedtuple(f"{row_type.__name__}Fields", names)
+    getter = attrgetter(*names)
+    if len(names) == 1:
+        return lambda row: projected(getter(row))
+    return lambda row: projected._make(getter(row))
+
+
+def _project(rows, row_type, fields, required=("id",)):
+    if fields is None:
+        return list(rows)
+    project = _projection(row_type, fields, required)
+    return [project(row) for row in rows]
+
+
+# Python types of the sort keys a cursor continues from
+CATEGORY_KEY_TYPES = (int, int)  # (order, id)
+ID_KEY_TYPES = (int,)
+
+
+def _page(rows, keys, key_types, skip, limit, cursor):
+    """Offset or keyset page of ``rows`` sorted by ``keys``, mirroring ``pagination.paginate``."""
+    if cursor is None:
+        start = max(skip, 0)  # SQLite ignores a negative OFFSET
+    else:
+        values = decode_cursor(cursor, key_types)
+        try:
+            start = bisect.bisect_right(keys, tuple(values))
+        except TypeError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    end = None if limit is None or limit < 0 else start + limit
+    return rows[start:end]
+
+
+def _sorted_group(rows):
+    return tuple(rows), [(row.id,) for row in rows]
+
+
+def load_rows(db):
+    """``(categories, examples, algorithms)`` as lists of row tuples, unsorted."""
+    def rows(model, row_type):
+        columns = [getattr(model, name) for name in row_type._fields]
+        return [row_type._make(row) for row in db.query(*columns)]
+
+    return rows(models.Category, CategoryRow), rows(models.Example, ExampleRow), rows(models.Algorithm, AlgorithmRow)
+
+
+class CatalogSnapshot:
+    """Immutable in-memory copy of the catalog with prebuilt indexes.
+
+    Its read methods mirror the ``crud`` read functions (same names and
+    arguments), so routes can serve from either. Snapshots are never
+    mutated; writes build a new one and swap it in.
+    """
+
+    __slots__ = (
+        "version", "loaded_at",
+        "categories", "category_keys", "categories_by_id", "categories_by_slug",
+        "examples", "example_keys", "examples_by_id", "examples_by_slug", "examples_by_category_id",
+        "algorithms", "algorithm_keys", "algorithms_by_id", "algorithms_by_slug", "algorithms_by_category",
+    )
+
+    def __init__(self, version, categories, examples, algorithms):
+        self.version = version
+        self.loaded_at = time.time()
+
+        self.categories = tuple(sorted(categories, key=self._category_key))
+        self.category_keys = [self._category_key(row) for row in self.categories]
+        self.categories_by_id = {row.id: row for row in self.categories}
+        self.categories_by_slug = {row.slug: row for row in self.categories}
+
+        self.examples, self.example_keys = _sorted_group(sorted(examples, key=attrgetter("id")))
+        self.examples_by_id = {row.id: row for row in self.examples}
+        self.examples_by_slug = {row.slug: row for row in self.examples}
+        groups = {}
+        for row in self.examples:
+            groups.setdefault(row.category_id, []).append(row)
+        self.examples_by_category_id = {key: _sorted_group(rows) for key, rows in groups.items()}
+
+        self.algorithms, self.algorithm_keys = _sorted_group(sorted(algorithms, key=attrgetter("id")))
+        self.algorithms_by_id = {row.id: row for row in self.algorithms}
+        self.algorithms_by_slug = {row.slug: row for row in self.algorithms}
+        groups = {}
+        for row in self.algorithms:
+            groups.setdefault(row.category, []).append(row)
+        self.algorithms_by_category = {key: _sorted_group(rows) for key, rows in groups.items()}
+
+    @staticmethod
+    def _category_key(row):
+        # SQLite sorts NULL first
+        return (float("-inf") if row.order is None else row.order, row.id)
+
+    @classmethod
+    def load(cls, db, version):
+        return cls(version, *load_rows(db))
+
+    # Categories
+
+    def get_categories(self, skip=0, limit=100, cursor=None, fields=None):
+        rows = _page(self.categories, self.category_keys, CATEGORY_KEY_TYPES, skip, limit, cursor)
+        return _project(rows, CategoryRow, fields, ("order", "id"))
+
+    def get_category(self, category_id, fields=None):
+        return self._one(self.categories_by_id.get(category_id), CategoryRow, fields)
+
+    def get_category_by_slug(self, slug, fields=None):
+        return self._one(self.categories_by_slug.get(slug), CategoryRow, fields)
+
+    def get_category_page(self, slug):
+        category = self.categories_by_slug.get(slug)
+        if category is None:
+            return None
+        examples = self.examples_by_category_id.get(category.id, ((), []))[0]
+        algorithms = self.algorithms_by_category.get(category.slug, ((), []))[0]
+        return {**category._asdict(), "examples": examples, "algorithms": algorithms}
+
+    def get_categories_by_keys(self, key, values, fields=None):
+        return self._by_keys(self.categories_by_id, self.categories_by_slug, CategoryRow, key, values, fields)
+
+    # Examples
+
+    def get_examples(self, skip=0, limit=100, category_id=None, cursor=None, fields=None):
+        rows, keys = self.examples, self.example_keys
+        if category_id:
+            rows, keys = self.examples_by_category_id.get(category_id, ((), []))
+        return _project(_page(rows, keys, ID_KEY_TYPES, skip, limit, cursor), ExampleRow, fields)
+
+    def get_example(self, example_id, fields=None):
+        return self._one(self.examples_by_id.get(example_id), ExampleRow, fields)
+
+    def get_example_by_slug(self, slug, fields=None):
+        return self._one(self.examples_by_slug.get(slug), ExampleRow, fields)
+
+    def get_examples_by_keys(self, key, values, fields=None):
+        return self._by_keys(self.examples_by_id, self.examples_by_slug, ExampleRow, key, values, fields)
+
+    # Algorithms
+
+    def get_algorithms(self, skip=0, limit=100, category=None, cursor=None, fields=None):
+        rows, keys = self.algorithms, self.algorithm_keys
+        if category:
+            rows, keys = self.algorithms_by_category.get(category, ((), []))
+        return _project(_page(rows, keys, ID_KEY_TYPES, skip, limit, cursor), AlgorithmRow, fields)
+
+    def get_algorithm(self, algorithm_id, fields=None):
+        return self._one(self.algorithms_by_id.get(algorithm_id), AlgorithmRow, fields)
+
+    def get_algorithm_by_slug(self, slug, fields=None):
+        return self._one(self.algorithms_by_slug.get(slug), AlgorithmRow, fields)
+
+    def get_algorithms_by_keys(self, key, values, fields=None):
+        return self._by_keys(self.algorithms_by_id, self.algorithms_by_slug, AlgorithmRow, key, values, fields)
+
+    # Helpers
+
+    @staticmethod
+    def _one(row, row_type, fields):
+        if row is None or fields is None:
+            return row
+        return _projection(row_type, fields, ())(row)
+
+    @staticmethod
+    def _by_keys(by_id, by_slug, row_type, key, values, fields):
+        index = by_id if key == "id" else by_slug
+        rows = [index[value] for value in dict.fromkeys(values) if value in index]
+        return _project(rows, row_type, fields, (key,))
+
+    def memory_usage(self):
+        """Approximate bytes held by the rows and indexes (shared values counted once)."""
+        seen = set()
+
+        def size(obj):
+            if id(obj) in seen:
+                return 0
+            seen.add(id(obj))
+            total = sys.getsizeof(obj)
+            if isinstance(obj, dict):
+                total += sum(size(key) + size(value) for key, value in obj.items())
+            elif isinstance(obj, (list, tuple)):
+                total += sum(size(item) for item in obj)
+            return total
+
+        row_bytes = sum(size(rows) for rows in (self.categories, self.examples, self.algorithms))
+        # Rows are already counted, so this is only the indexes' own overhead
+        index_bytes = sum(size(getattr(self, name)) for name in self.__slots__[2:])
+        row_count = len(self.categories) + len(self.examples) + len(self.algorithms)
+        return {
+            "rows": row_count,
+            "row_bytes": row_bytes,
+            "index_bytes": index_bytes,
+            "bytes_per_row": row_bytes / row_count if row_count else 0.0,
+        }
+
+
+_snapshot = None
+_refresh_lock = threading.Lock()
+
+
+def current():
+    """The live snapshot, or ``None`` when reads go to the database."""
+    return _snapshot
+
+
+def install(snapshot):
+    """Atomically make ``snapshot`` the live one."""
+    global _snapshot
+    _snapshot = snapshot
+
+
+def refresh():
+    """Rebuild the snapshot from the database and atomically swap it in.
+
+    Readers keep whichever snapshot they already hold; the lock only
+    serialises rebuilds, so a later rebuild always reflects later writes.
+    """
+    if config.CATALOG_MODE == "shared":
+        from app import shared_catalog
+        return shared_catalog.publish()
+    with _refresh_lock:
+        version = _snapshot.version + 1 if _snapshot is not None else 1
+        db = SessionLocal()
+        try:
+            snapshot = CatalogSnapshot.load(db, version)
+        finally:
+            db.close()
+        install(snapshot)
+    return snapshot
+
+
+async def run_read(db, fn, *args):
+    """Run a ``crud`` read function, or its in-memory counterpart when a snapshot is live."""
+    snapshot = _snapshot
+    if snapshot is not None:
+        return getattr(snapshot, fn.__name__)(*args)
+    return await run_db(db, fn, *args)
+
+
+async def publish_write(*tags):
+    """Call after a committed write to the ``tags`` tables.
+
+    Swaps in a fresh snapshot first (in memory and shared modes) and only then
+    invalidates the cached responses, so a cache refill can't capture the
+    old snapshot under the new version.
+    """
+    if config.CATALOG_MODE in ("memory", "shared"):
+        await run_in_threadpool(refresh)
+    for tag in tags:
+        response_cache.invalidate(tag)
@@ -0,0 +1,87 @@
+import gzip
+import threading
+import time
+
+from app import config
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip is offered without it
+    brotli = None
+
+# In order of preference when the client accepts several equally
+CODECS = {}
+if brotli is not None:
+    CODECS["br"] = lambda body: brotli.compress(body, quality=config.BROTLI_QUALITY)
+CODECS["gzip"] = lambda body: gzip.compress(body, compresslevel=config.GZIP_LEVEL, mtime=0)
+
+
+def negotiate(accept_encoding):
+    """Pick the best supported coding from an ``Accept-Encoding`` header, or ``None``."""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[coding.strip().lower()] = quality
+    best, best_quality = None, 0.0
+    for coding in CODECS:
+        quality = weights.get(coding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+class CompressionStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.compressions = 0
+        self.compress_seconds = 0.0
+        self.precompressed_hits = 0
+
+    def record_compression(self, seconds):
+        with self._lock:
+            self.compressions += 1
+            self.compress_seconds += seconds
+
+    def record_hit(self):
+        with self._lock:
+            self.precompressed_hits += 1
+
+    def snapshot(self):
+        with self._lock:
+            average = self.compress_seconds / self.compressions if self.compressions else 0.0
+            return {
+                "compressions": self.compressions,
+                "compress_cpu_seconds": self.compress_seconds,
+                "precompressed_hits": self.precompressed_hits,
+                # CPU that on-the-fly compression would have spent on the hits
+                "estimated_cpu_seconds_saved": average * self.precompressed_hits,
+            }
+
+
+compression_stats = CompressionStats()
+
+
+def compressed_body(variants, body, coding):
+    """``body`` encoded with ``coding``, reusing (and filling) the ``variants`` store.
+
+    Compressing is CPU-bound; call it on the threadpool when ``coding`` isn't
+    in ``variants`` yet.
+    """
+    encoded = variants.get(coding)
+    if encoded is not None:
+        compression_stats.record_hit()
+        return encoded
+    started = time.thread_time()
+    encoded = CODECS[coding](body)
+    compression_stats.record_compression(time.thread_time() - started)
+    variants[coding] = encoded
+    return encoded
@@ -0,0 +1,83 @@
+import os
+
+# Response cache
+CACHE_MAX_ENTRIES = int(os.getenv("DSA_CACHE_MAX_ENTRIES", "512"))
+CACHE_TTL_SECONDS = float(os.getenv("DSA_CACHE_TTL_SECONDS", "300"))
+# Concurrent cache misses for the same response share one database load
+SINGLE_FLIGHT = os.getenv("DSA_SINGLE_FLIGHT", "1") == "1"
+
+# Database
+DATABASE_URL = os.getenv("DSA_DATABASE_URL", "sqlite:///./dsa_learning.db")
+ASYNC_DATABASE_URL = os.getenv("DSA_ASYNC_DATABASE_URL", DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1))
+DB_MODE = os.getenv("DSA_DB_MODE", "sync")  # "sync" (threadpool) or "async" (aiosqlite)
+
+# SQLite connection profile, applied to every new connection
+SQLITE_JOURNAL_MODE = os.getenv("DSA_SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("DSA_SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_MMAP_SIZE = int(os.getenv("DSA_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE = int(os.getenv("DSA_SQLITE_CACHE_SIZE", "-65536"))  # negative = KiB
+SQLITE_TEMP_STORE = os.getenv("DSA_SQLITE_TEMP_STORE", "MEMORY")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("DSA_SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+# Connection pool; pool size + overflow matches the default 40-thread
+# threadpool that runs sync-mode queries
+DB_POOL_SIZE = int(os.getenv("DSA_DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DSA_DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DSA_DB_POOL_TIMEOUT", "30"))
+
+# Serialization: build read responses straight from row tuples (orjson when
+# installed) instead of validating every row through the pydantic schemas
+FAST_SERIALIZATION = os.getenv("DSA_FAST_SERIALIZATION", "0") == "1"
+
+# Compression of cacheable responses; bodies are compressed once per cache
+# entry and version, on the threadpool. Brotli quality 11 costs seconds per
+# megabyte, so it's left to the offline export_static.py
+COMPRESSION_MIN_SIZE = int(os.getenv("DSA_COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("DSA_GZIP_LEVEL", "9"))
+BROTLI_QUALITY = int(os.getenv("DSA_BROTLI_QUALITY", "5"))
+
+# Streaming NDJSON exports: rows fetched per cursor batch and per response chunk
+EXPORT_BATCH_SIZE = int(os.getenv("DSA_EXPORT_BATCH_SIZE", "1000"))
+
+# Catalog: "database" serves reads from SQLite, "memory" from an immutable
+# in-process snapshot that writes rebuild and swap, "shared" from a snapshot
+# published through memory-mapped files to every uvicorn worker
+CATALOG_MODE = os.getenv("DSA_CATALOG_MODE", "database")
+CATALOG_SHARED_DIR = os.getenv("DSA_CATALOG_SHARED_DIR", "./.catalog_shared")
+
+# Delta sync: tombstones for deleted rows are kept this long; clients that
+# last synced before the oldest compacted tombstone get a full reset
+SYNC_TOMBSTONE_RETENTION_DAYS = float(os.getenv("DSA_SYNC_TOMBSTONE_RETENTION_DAYS", "30"))
+
+# Metrics: per-route latency/size histograms and SQL timing at /api/metrics
+METRICS = os.getenv("DSA_METRICS", "1") == "1"
+
+# Query log: "production" logs slow requests, slow statements (with their
+# query plan), repeated statement shapes and table scans to dsa.querylog;
+# "development" also explains every new statement shape; "off" disables
+QUERY_LOG = os.getenv("DSA_QUERY_LOG", "production")
+SLOW_QUERY_MS = float(os.getenv("DSA_SLOW_QUERY_MS", "50"))
+SLOW_REQUEST_MS = float(os.getenv("DSA_SLOW_REQUEST_MS", "500"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("DSA_N_PLUS_ONE_THRESHOLD", "5"))
+
+# Startup: "full" applies pending migrations and includes every router before
+# serving; "fast" only checks the schema version (run python -m app.migrations
+# as a deploy step) and imports each router on first use
+STARTUP_MODE = os.getenv("DSA_STARTUP_MODE", "full")
+
+# Sandbox for POST /api/algorithms/{slug}/run: warm worker processes (0, the
+# default, disables the endpoint; workers confine themselves in user
+# namespaces, so the server needs no root), each run's wall-clock and CPU
+# limits, the memory limit per worker, runs before a worker is replaced, and
+# how many requests may wait for a free worker before the endpoint answers 503
+SANDBOX_WORKERS = int(os.getenv("DSA_SANDBOX_WORKERS", "0"))
+SANDBOX_TIMEOUT_SECONDS = float(os.getenv("DSA_SANDBOX_TIMEOUT_SECONDS", "2"))
+SANDBOX_CPU_SECONDS = float(os.getenv("DSA_SANDBOX_CPU_SECONDS", "1"))
+SANDBOX_MEMORY_MB = int(os.getenv("DSA_SANDBOX_MEMORY_MB", "256"))
+SANDBOX_MAX_RUNS = int(os.getenv("DSA_SANDBOX_MAX_RUNS", "1000"))
+SANDBOX_MAX_PENDING = int(os.getenv("DSA_SANDBOX_MAX_PENDING", "256"))
+SANDBOX_MAX_OUTPUT_BYTES = int(os.getenv("DSA_SANDBOX_MAX_OUTPUT_BYTES", "65536"))
+# Unprivileged ids the workers switch to first if the server runs as root anyway
+# (default: nobody/nogroup)
+SANDBOX_UID = int(os.getenv("DSA_SANDBOX_UID", "65534"))
+SANDBOX_GID = int(os.getenv("DSA_SANDBOX_GID", "65534"))
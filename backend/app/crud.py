@@ -0,0 +1,233 @@
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
+from app import config, models, schemas
+from app.pagination import paginate
+from app.projection import select_fields
+
+# Categories
+
+CATEGORY_CURSOR = ("order", "id")
+
+def get_categories(db: Session, skip: int = 0, limit: int = 100, cursor: str = None, fields: tuple = None):
+    query = select_fields(db, models.Category, fields, CATEGORY_CURSOR)
+    return paginate(query, (models.Category.order, models.Category.id), skip, limit, cursor).all()
+
+def get_category(db: Session, category_id: int, fields: tuple = None):
+    return select_fields(db, models.Category, fields).filter(models.Category.id == category_id).first()
+
+def get_category_by_slug(db: Session, slug: str, fields: tuple = None):
+    return select_fields(db, models.Category, fields).filter(models.Category.slug == slug).first()
+
+def get_category_page(db: Session, slug: str):
+    # One query for the category plus one IN query per relationship
+    return (
+        db.query(models.Category)
+        .options(selectinload(models.Category.examples), selectinload(models.Category.algorithms))
+        .filter(models.Category.slug == slug)
+        .first()
+    )
+
+def get_categories_by_keys(db: Session, key: str, values: list, fields: tuple = None):
+    # One IN query for a batch of ids or slugs; order is restored by the caller
+    column = getattr(models.Category, key)
+    return select_fields(db, models.Category, fields, (key,)).filter(column.in_(set(values))).all()
+
+def create_category(db: Session, category: schemas.CategoryCreate):
+    db_category = models.Category(**category.dict())
+    db.add(db_category)
+    db.commit()
+    db.refresh(db_category)
+    return db_category
+
+def update_category(db: Session, category_id: int, category: schemas.CategoryCreate):
+    db_category = get_category(db, category_id)
+    if db_category is None:
+        return None
+
+    for key, value in category.dict().items():
+        setattr(db_category, key, value)
+
+    db.commit()
+    db.refresh(db_category)
+    return db_category
+
+def delete_category(db: Session, category_id: int):
+    db_category = get_category(db, category_id)
+    if db_category is None:
+        return False
+
+    db.delete(db_category)
+    db.commit()
+    return True
+
+# Examples
+
+EXAMPLE_CURSOR = ("id",)
+EXAMPLE_SUMMARY_FIELDS = tuple(schemas.ExampleSummary.model_fields)
+EXAMPLE_FIELDS = tuple(schemas.Example.model_fields)
+
+def get_examples(db: Session, skip: int = 0, limit: int = 100, category_id: int = None, cursor: str = None, fields: tuple = None):
+    query = select_fields(db, models.Example, fields, EXAMPLE_CURSOR)
+    if category_id:
+        query = query.filter(models.Example.category_id == category_id)
+    return paginate(query, (models.Example.id,), skip, limit, cursor).all()
+
+def iter_examples(db: Session, category_id: int = None, fields: tuple = EXAMPLE_FIELDS):
+    # Rows are fetched from the cursor in batches as the caller iterates
+    query = select_fields(db, models.Example, fields, ())
+    if category_id:
+        query = query.filter(models.Example.category_id == category_id)
+    return query.order_by(models.Example.id).execution_options(yield_per=config.EXPORT_BATCH_SIZE)
+
+def get_example(db: Session, example_id: int, fields: tuple = None):
+    return select_fields(db, models.Example, fields).filter(models.Example.id == example_id).first()
+
+def get_example_by_slug(db: Session, slug: str, fields: tuple = None):
+    return select_fields(db, models.Example, fields).filter(models.Example.slug == slug).first()
+
+def get_examples_by_keys(db: Session, key: str, values: list, fields: tuple = None):
+    # One IN query for a batch of ids or slugs; order is restored by the caller
+    column = getattr(models.Example, key)
+    return select_fields(db, models.Example, fields, (key,)).filter(column.in_(set(values))).all()
+
+def create_example(db: Session, example: schemas.ExampleCreate):
+    db_example = models.Example(**example.dict())
+    db.add(db_example)
+    db.commit()
+    db.refresh(db_example)
+    return db_example
+
+def update_example(db: Session, example_id: int, example: schemas.ExampleCreate):
+    db_example = get_example(db, example_id)
+    if db_example is None:
+        return None
+
+    for key, value in example.dict().items():
+        setattr(db_example, key, value)
+
+    db.commit()
+    db.refresh(db_example)
+    return db_example
+
+def delete_example(db: Session, example_id: int):
+    db_example = get_example(db, example_id)
+    if db_example is None:
+        return False
+
+    db.delete(db_example)
+    db.commit()
+    return True
+
+# Algorithms
+
+ALGORITHM_CURSOR = ("id",)
+ALGORITHM_SUMMARY_FIELDS = tuple(schemas.AlgorithmSummary.model_fields)
+ALGORITHM_FIELDS = tuple(schemas.Algorithm.model_fields)
+
+def get_algorithms(db: Session, skip: int = 0, limit: int = 100, category: str = None, cursor: str = None, fields: tuple = None):
+    # With a category filter this walks (category, id) order
+    query = select_fields(db, models.Algorithm, fields, ALGORITHM_CURSOR)
+    if category:
+        query = query.filter(models.Algorithm.category == category)
+    return paginate(query, (models.Algorithm.id,), skip, limit, cursor).all()
+
+def iter_algorithms(db: Session, category: str = None, fields: tuple = ALGORITHM_FIELDS):
+    # Rows are fetched from the cursor in batches as the caller iterates
+    query = select_fields(db, models.Algorithm, fields, ())
+    if category:
+        query = query.filter(models.Algorithm.category == category)
+    return query.order_by(models.Algorithm.id).execution_options(yield_per=config.EXPORT_BATCH_SIZE)
+
+def get_algorithm(db: Session, algorithm_id: int, fields: tuple = None):
+    return select_fields(db, models.Algorithm, fields).filter(models.Algorithm.id == algorithm_id).first()
+
+def get_algorithm_by_slug(db: Session, slug: str, fields: tuple = None):
+    return select_fields(db, models.Algorithm, fields).filter(models.Algorithm.slug == slug).first()
+
+def get_algorithms_by_keys(db: Session, key: str, values: list, fields: tuple = None):
+    # One IN query for a batch of ids or slugs; order is restored by the caller
+    column = getattr(models.Algorithm, key)
+    return select_fields(db, models.Algorithm, fields, (key,)).filter(column.in_(set(values))).all()
+
+def create_algorithm(db: Session, algorithm: schemas.AlgorithmCreate):
+    db_algorithm = models.Algorithm(**algorithm.dict())
+    db.add(db_algorithm)
+    db.commit()
+    db.refresh(db_algorithm)
+    return db_algorithm
+
+def update_algorithm(db: Session, algorithm_id: int, algorithm: schemas.AlgorithmCreate):
+    db_algorithm = get_algorithm(db, algorithm_id)
+    if db_algorithm is None:
+        return None
+
+    for key, value in algorithm.dict().items():
+        setattr(db_algorithm, key, value)
+
+    db.commit()
+    db.refresh(db_algorithm)
+    return db_algorithm
+
+def delete_algorithm(db: Session, algorithm_id: int):
+    db_algorithm = get_algorithm(db, algorithm_id)
+    if db_algorithm is None:
+        return False
+
+    db.delete(db_algorithm)
+    db.commit()
+    return True
+
+# Bulk writes
+
+BULK_CHUNK_SIZE = 500
+
+def _ids_by_slug(db: Session, model, slugs):
+    ids = {}
+    for start in range(0, len(slugs), BULK_CHUNK_SIZE):
+        chunk = slugs[start:start + BULK_CHUNK_SIZE]
+        ids.update(db.query(model.slug, model.id).filter(model.slug.in_(chunk)).all())
+    return ids
+
+def bulk_write(db: Session, model, items: list, upsert: bool = False):
+    """Insert (or upsert by slug) ``items`` in a single transaction.
+
+    The whole payload is checked before anything is written. Returns
+    ``(results, errors)``: per-row ``schemas.BulkResult`` dicts on success,
+    or per-row error dicts and no writes at all.
+    """
+    rows = [item.dict() for item in items]
+    slugs = [row["slug"] for row in rows]
+
+    errors = []
+    first_index = {}
+    for index, slug in enumerate(slugs):
+        if slug in first_index:
+            errors.append({"index": index, "slug": slug, "error": f"duplicate of row {first_index[slug]}"})
+        first_index.setdefault(slug, index)
+    existing = _ids_by_slug(db, model, list(first_index))
+    if not upsert:
+        errors.extend({"index": index, "slug": slug, "error": "slug already exists"}
+                      for index, slug in enumerate(slugs) if slug in existing)
+    if errors:
+        return [], sorted(errors, key=lambda error: error["index"])
+
+    new_rows = [row for row in rows if row["slug"] not in existing]
+    changed_rows = [dict(row, id=existing[row["slug"]]) for row in rows if row["slug"] in existing]
+    try:
+        # executemany-style ORM bulk statements, one commit for the whole batch
+        if new_rows:
+            db.execute(insert(model), new_rows)
+        if changed_rows:
+            db.execute(update(model), changed_rows)
+        db.commit()
+    except IntegrityError as exc:
+        db.rollback()
+        return [], [{"index": None, "slug": None, "error": str(exc.orig)}]
+
+    ids = {**existing, **_ids_by_slug(db, model, [row["slug"] for row in new_rows])}
+    results = [
+        {"index": index, "slug": slug, "id": ids[slug], "status": "updated" if slug in existing else "created"}
+        for index, slug in enumerate(slugs)
+    ]
+    return results, []
@@ -1,21 +1,117 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.concurrency import run_in_threadpool
+from app import config
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./dsa_learning.db"
+SQLALCHEMY_DATABASE_URL = config.DATABASE_URL
+
+SQLITE_PRAGMAS = {
+    "journal_mode": config.SQLITE_JOURNAL_MODE,
+    "synchronous": config.SQLITE_SYNCHRONOUS,
+    "mmap_size": config.SQLITE_MMAP_SIZE,
+    "cache_size": config.SQLITE_CACHE_SIZE,
+    "temp_store": config.SQLITE_TEMP_STORE,
+    "busy_timeout": config.SQLITE_BUSY_TIMEOUT_MS,
+}
+
+def _is_file_sqlite(url):
+    return url.startswith("sqlite") and ":memory:" not in url and not url.rstrip("/").endswith(":")
+
+def _pool_options(url, poolclass):
+    if not _is_file_sqlite(url):
+        return {}
+    return {
+        "poolclass": poolclass,
+        "pool_size": config.DB_POOL_SIZE,
+        "max_overflow": config.DB_MAX_OVERFLOW,
+        "pool_timeout": config.DB_POOL_TIMEOUT,
+    }
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+def _read_pragmas(connection):
+    return {name: connection.exec_driver_sql(f"PRAGMA {name}").scalar() for name in SQLITE_PRAGMAS}
+
+def _pool_settings(bind):
+    pool = bind.pool
+    settings = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        settings["pool_size"] = pool.size()
+        settings["max_overflow"] = pool._max_overflow
+    return settings
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, 
-    connect_args={"check_same_thread": False}
+    connect_args={"check_same_thread": False},
+    **_pool_options(SQLALCHEMY_DATABASE_URL, QueuePool)
 )
+if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine (aiosqlite), used by the routers when DSA_DB_MODE=async
+async_engine = None
+AsyncSessionLocal = None
+if config.DB_MODE == "async":
+    # Imported here: sqlalchemy.ext.asyncio is a noticeable share of a sync-mode cold start
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_engine = create_async_engine(config.ASYNC_DATABASE_URL, **_pool_options(config.ASYNC_DATABASE_URL, AsyncAdaptedQueuePool))
+    if config.ASYNC_DATABASE_URL.startswith("sqlite"):
+        event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autocommit=False, autoflush=False)
+
 Base = declarative_base()
 
-def get_db():
+async def get_db():
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def close_engines():
+    """Close pooled connections; aiosqlite's connection threads keep the process alive until they're closed."""
+    if async_engine is not None:
+        await async_engine.dispose()
+    engine.dispose()
+
+async def startup_report():
+    """Database settings that actually took effect, read back from a live connection."""
+    if async_engine is not None:
+        report = {"mode": config.DB_MODE, "url": config.ASYNC_DATABASE_URL, **_pool_settings(async_engine.sync_engine)}
+        if config.ASYNC_DATABASE_URL.startswith("sqlite"):
+            async with async_engine.connect() as connection:
+                report["pragmas"] = await connection.run_sync(_read_pragmas)
+        return report
+
+    report = {"mode": config.DB_MODE, "url": SQLALCHEMY_DATABASE_URL, **_pool_settings(engine)}
+    if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
+        with engine.connect() as connection:
+            report["pragmas"] = _read_pragmas(connection)
+    return report
+
+async def run_db(db, fn, *args):
+    """Run ``fn(session, *args)`` without blocking the event loop.
+
+    Query code is written once against the sync ``Session`` API: an
+    ``AsyncSession`` runs it on its async driver via ``run_sync``, a plain
+    ``Session`` runs it on the threadpool.
+    """
+    if not isinstance(db, Session):
+        return await db.run_sync(fn, *args)
+    return await run_in_threadpool(fn, db, *args)
@@ -0,0 +1,180 @@
+"""Request and SQL metrics, exposed in the Prometheus text format.
+
+``MetricsMiddleware`` times every request and counts the bytes it sends;
+SQLAlchemy engine events time every statement and add it to the current
+request's ``RequestStats`` (found through a context variable, which is
+copied into the threadpool and into SQLAlchemy's async greenlets). Samples
+are recorded under the route template, e.g. ``/api/algorithms/{algorithm_id}``,
+so label cardinality stays bounded.
+"""
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app import config
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Flipped at runtime by the overhead benchmark
+enabled = config.METRICS
+
+
+class Histogram:
+    def __init__(self, name, help, buckets, labels):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.labels = labels
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 3)
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        for labels, values in sorted(series.items()):
+            base = ",".join(f'{name}="{value}"' for name, value in zip(self.labels, labels))
+            prefix = base + "," if base else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {values[-1]}')
+            lines.append(f"{self.name}_sum{{{base}}} {values[-2]}")
+            lines.append(f"{self.name}_count{{{base}}} {values[-1]}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help, labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            base = ",".join(f'{name}="{value}"' for name, value in zip(self.labels, labels))
+            lines.append(f"{self.name}{{{base}}} {value}")
+        return lines
+
+
+request_duration = Histogram("dsa_http_request_duration_seconds", "Request latency by route.", LATENCY_BUCKETS, ("method", "route"))
+response_size = Histogram("dsa_http_response_size_bytes", "Response body bytes sent by route.", SIZE_BUCKETS, ("method", "route"))
+requests_total = Counter("dsa_http_requests_total", "Requests by route and status.", ("method", "route", "status"))
+statement_duration = Histogram("dsa_db_statement_duration_seconds", "SQL statement latency by route.", LATENCY_BUCKETS, ("route",))
+statements_per_request = Histogram("dsa_db_statements_per_request", "SQL statements executed per request by route.", COUNT_BUCKETS, ("route",))
+in_flight = 0
+
+
+class RequestStats:
+    """What the SQL event hooks record for the request being served."""
+
+    __slots__ = ("statement_durations",)
+
+    def __init__(self):
+        self.statement_durations = []
+
+
+current_request = ContextVar("current_request", default=None)
+
+
+def route_label(scope):
+    route = scope.get("route")
+    return route.path if route is not None else "unmatched"
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        global in_flight
+        if scope["type"] != "http" or not enabled:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status = 500
+        sent = 0
+
+        async def send_wrapper(message):
+            nonlocal status, sent
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+            await send(message)
+
+        in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_flight -= 1
+            current_request.reset(token)
+            method, route = scope["method"], route_label(scope)
+            request_duration.observe((method, route), elapsed)
+            response_size.observe((method, route), sent)
+            requests_total.inc((method, route, str(status)))
+            for duration in stats.statement_durations:
+                statement_duration.observe((route,), duration)
+            statements_per_request.observe((route,), len(stats.statement_durations))
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_request.get() is not None:
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request.get()
+    started = conn.info.get("metrics_started")
+    if stats is not None and started:
+        stats.statement_durations.append(time.perf_counter() - started.pop())
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    started = context.connection.info.get("metrics_started") if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+def render():
+    lines = [
+        "# HELP dsa_http_requests_in_flight Requests currently being served.",
+        "# TYPE dsa_http_requests_in_flight gauge",
+        f"dsa_http_requests_in_flight {in_flight}",
+    ]
+    for metric in (requests_total, request_duration, response_size, statement_duration, statements_per_request):
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
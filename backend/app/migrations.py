@@ -0,0 +1,169 @@
+"""Versioned schema migrations, tracked in SQLite's ``PRAGMA user_version``.
+
+Each migration runs in its own transaction together with the version bump,
+so a failed migration leaves the database at the previous version. The
+first ones are written to be idempotent, so databases created by the old
+``create_all`` call (version 0 with every table present) are adopted as is.
+Append new migrations to ``MIGRATIONS``; never edit or reorder shipped ones.
+
+    python -m app.migrations           # migrate to the latest version
+    python -m app.migrations --status  # print current and latest version
+"""
+import argparse
+
+from app import search, sync
+
+# Migrations are frozen as literal DDL rather than built from the live models
+# or schemas, so a later model change can't alter what a shipped one does.
+# This is what create_all emitted for the models when migration 1 shipped.
+INITIAL_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS algorithms (
+	id INTEGER NOT NULL,
+	name VARCHAR(200) NOT NULL,
+	slug VARCHAR(200) NOT NULL,
+	category VARCHAR(100),
+	description TEXT,
+	explanation TEXT,
+	pseudocode TEXT,
+	python_code TEXT,
+	javascript_code TEXT,
+	time_complexity_best VARCHAR(50),
+	time_complexity_average VARCHAR(50),
+	time_complexity_worst VARCHAR(50),
+	space_complexity VARCHAR(50),
+	difficulty VARCHAR(12),
+	use_cases TEXT,
+	visualization_data TEXT,
+	PRIMARY KEY (id),
+	UNIQUE (slug)
+)""",
+    "CREATE INDEX IF NOT EXISTS ix_algorithms_id ON algorithms (id)",
+    """CREATE TABLE IF NOT EXISTS categories (
+	id INTEGER NOT NULL,
+	name VARCHAR(100) NOT NULL,
+	slug VARCHAR(100) NOT NULL,
+	description TEXT,
+	type VARCHAR(14) NOT NULL,
+	icon VARCHAR(50),
+	"order" INTEGER,
+	PRIMARY KEY (id),
+	UNIQUE (name),
+	UNIQUE (slug)
+)""",
+    "CREATE INDEX IF NOT EXISTS ix_categories_id ON categories (id)",
+    """CREATE TABLE IF NOT EXISTS examples (
+	id INTEGER NOT NULL,
+	title VARCHAR(200) NOT NULL,
+	slug VARCHAR(200) NOT NULL,
+	category_id INTEGER,
+	description TEXT,
+	explanation TEXT,
+	time_complexity VARCHAR(50),
+	space_complexity VARCHAR(50),
+	difficulty VARCHAR(12),
+	code_example TEXT,
+	visualization_data TEXT,
+	use_cases TEXT,
+	pros TEXT,
+	cons TEXT,
+	PRIMARY KEY (id),
+	UNIQUE (slug),
+	FOREIGN KEY(category_id) REFERENCES categories (id)
+)""",
+    "CREATE INDEX IF NOT EXISTS ix_examples_id ON examples (id)",
+]
+
+
+def initial_schema(connection):
+    for statement in INITIAL_SCHEMA:
+        connection.exec_driver_sql(statement)
+
+
+# One index per filter/sort the read routes use, leading with the filter
+# column and ending with the keyset columns so pages come out in index order
+SECONDARY_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS ix_categories_order_id ON categories ("order", id)',
+    "CREATE INDEX IF NOT EXISTS ix_examples_category_id_id ON examples (category_id, id)",
+    "CREATE INDEX IF NOT EXISTS ix_algorithms_category_id ON algorithms (category, id)",
+    # Change-log compaction looks up old tombstones only
+    "CREATE INDEX IF NOT EXISTS ix_change_log_tombstones ON change_log (changed_at) WHERE op = 'delete'",
+]
+
+
+def create_secondary_indexes(connection):
+    for statement in SECONDARY_INDEXES:
+        connection.exec_driver_sql(statement)
+
+
+# ?summary=true lists filtered by category are answered from the index
+# alone, without touching the rows' large text columns: filter and keyset
+# columns, then the ExampleSummary/AlgorithmSummary fields as they were when
+# migration 5 shipped
+COVERING_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS ix_examples_summary ON examples ("category_id", "id", "title", "slug", '
+    '"time_complexity", "space_complexity", "difficulty")',
+    'CREATE INDEX IF NOT EXISTS ix_algorithms_summary ON algorithms ("category", "id", "name", "slug", '
+    '"time_complexity_best", "time_complexity_average", "time_complexity_worst", "space_complexity", "difficulty")',
+]
+
+
+def create_covering_indexes(connection):
+    for statement in COVERING_INDEXES:
+        connection.exec_driver_sql(statement)
+
+
+MIGRATIONS = [
+    (1, "initial schema", initial_schema),
+    (2, "full-text search index", search.create_search_index),
+    (3, "change log for delta sync", sync.create_change_log),
+    (4, "secondary indexes for route filters and sorts", create_secondary_indexes),
+    (5, "covering indexes for summary lists", create_covering_indexes),
+]
+LATEST = MIGRATIONS[-1][0]
+
+
+def current_version(connection):
+    return connection.exec_driver_sql("PRAGMA user_version").scalar()
+
+
+def migrate(bind, verbose=False):
+    """Apply every migration newer than the database's version; returns the versions applied."""
+    applied = []
+    for version, description, upgrade in MIGRATIONS:
+        with bind.connect() as connection:
+            # pysqlite doesn't wrap DDL in a transaction by itself; BEGIN IMMEDIATE
+            # makes each migration atomic and serialises workers migrating at once
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+            try:
+                if current_version(connection) >= version:
+                    connection.rollback()
+                    continue
+                upgrade(connection)
+                connection.exec_driver_sql(f"PRAGMA user_version = {version}")
+                connection.commit()
+            except BaseException:
+                connection.rollback()
+                raise
+        applied.append(version)
+        if verbose:
+            print(f"Applied migration {version}: {description}")
+    return applied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate the catalog database schema")
+    parser.add_argument("--status", action="store_true", help="only print the current and latest version")
+    args = parser.parse_args()
+
+    from app.database import engine
+
+    if args.status:
+        with engine.connect() as connection:
+            print(f"Schema version {current_version(connection)} (latest {LATEST})")
+        return
+    if not migrate(engine, verbose=True):
+        print(f"Schema is up to date (version {LATEST})")
+
+
+if __name__ == "__main__":
+    main()
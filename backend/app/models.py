@@ -23,7 +23,14 @@ class Category(Base):
     icon = Column(String(50))
     order = Column(Integer, default=0)
     
-    examples = relationship("Example", back_populates="category")
+    examples = relationship("Example", back_populates="category", order_by="Example.id")
+    # Algorithms reference their category by slug rather than by foreign key
+    algorithms = relationship(
+        "Algorithm",
+        primaryjoin="Category.slug == foreign(Algorithm.category)",
+        order_by="Algorithm.id",
+        viewonly=True,
+    )
 
 class Example(Base):
     __tablename__ = "examples"
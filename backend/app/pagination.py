@@ -0,0 +1,58 @@
+import base64
+import json
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values):
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _fits(value, kind):
+    if isinstance(value, bool):  # JSON true/false would pass as int
+        return False
+    if kind is float:
+        return isinstance(value, (int, float))
+    return isinstance(value, kind)
+
+
+def decode_cursor(cursor, types):
+    """Values of ``cursor`` for sort columns of Python ``types``; 400 unless there's one of the right type per column."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != len(types):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not all(_fits(value, kind) for value, kind in zip(values, types)):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def paginate(query, columns, skip, limit, cursor=None):
+    """Order ``query`` by ``columns`` and page it by keyset or, without a cursor, by offset.
+
+    ``cursor`` is the opaque value from a previous page's ``X-Next-Cursor``
+    header; with it the page starts right after that row using an index seek
+    instead of scanning and discarding ``skip`` rows.
+    """
+    query = query.order_by(*columns)
+    if cursor is None:
+        return query.offset(skip).limit(limit)
+    values = decode_cursor(cursor, tuple(column.type.python_type for column in columns))
+    if len(columns) == 1:
+        return query.filter(columns[0] > values[0]).limit(limit)
+    return query.filter(tuple_(*columns) > tuple_(*values)).limit(limit)
+
+
+def next_cursor_headers(rows, limit, attributes):
+    """``X-Next-Cursor`` header for a full page, built from its last row."""
+    if limit <= 0 or len(rows) < limit:
+        return {}
+    last = rows[-1]
+    return {NEXT_CURSOR_HEADER: encode_cursor(getattr(last, name) for name in attributes)}
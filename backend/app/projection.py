@@ -0,0 +1,64 @@
+from functools import lru_cache
+
+from fastapi import HTTPException
+from typing import Optional, Union
+
+from pydantic import ConfigDict, create_model
+
+
+def parse_fields(fields, schema):
+    """Validate a ``fields=a,b,c`` query value against ``schema``.
+
+    Returns the requested names in the schema's own field order, so that
+    equivalent requests share SQL, response schemas and cache entries, or
+    ``None`` when no projection was asked for (including ``fields=,`` and
+    other values that name no field).
+    """
+    if not fields:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    if not requested:
+        return None
+    unknown = requested.difference(schema.model_fields)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown field(s): {', '.join(sorted(unknown))}")
+    return tuple(name for name in schema.model_fields if name in requested)
+
+
+@lru_cache(maxsize=256)
+def projected_schema(schema, fields):
+    """A response model with only ``fields`` of ``schema``, built once per field set."""
+    if fields is None:
+        return schema
+    definitions = {name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in fields}
+    return create_model(
+        f"{schema.__name__}Fields",
+        __config__=ConfigDict(from_attributes=True),
+        **definitions,
+    )
+
+
+@lru_cache(maxsize=256)
+def batch_item_schema(schema):
+    """``{"key": ..., "found": ..., "item": schema | null}`` entry of a batch lookup response."""
+    return create_model(
+        f"{schema.__name__}BatchItem",
+        __config__=ConfigDict(from_attributes=True),
+        key=(Union[int, str], ...),
+        found=(bool, ...),
+        item=(Optional[schema], None),
+    )
+
+
+def batch_results(rows, attribute, values):
+    """Order ``rows`` as ``values`` were requested, marking the ones not found."""
+    by_key = {getattr(row, attribute): row for row in rows}
+    return [{"key": value, "found": value in by_key, "item": by_key.get(value)} for value in values]
+
+
+def select_fields(db, model, fields, required=("id",)):
+    """Query ``model`` rows, or only the ``fields`` columns (plus ``required`` ones) when given."""
+    if fields is None:
+        return db.query(model)
+    names = list(fields) + [name for name in required if name not in fields]
+    return db.query(*(getattr(model, name) for name in names))
@@ -0,0 +1,173 @@
+"""Slow-request log and N+1 detector.
+
+``QueryLogMiddleware`` collects every SQL statement a request runs (through
+engine events and a context variable, like ``app.metrics``) and, once the
+response has been sent, writes one JSON record to the ``dsa.querylog``
+logger for requests that were slow, ran a slow statement, repeated the same
+statement shape too often (the N+1 pattern), or hit a full table scan.
+
+``production`` mode runs EXPLAIN QUERY PLAN only for slow statements;
+``development`` mode also explains every new statement shape once, so scans
+are caught while they are still fast.
+"""
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import Context, ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+
+from app import config
+from app.metrics import route_label
+
+logger = logging.getLogger("dsa.querylog")
+
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE = re.compile(r"\s+")
+
+_current = ContextVar("querylog_statements", default=None)
+_plans = {}  # statement shape -> EXPLAIN QUERY PLAN lines (development mode)
+
+
+def statement_shape(statement):
+    """Statement text with whitespace and ``IN (?, ?, ...)`` lists collapsed."""
+    return _IN_LIST.sub("(?, ...)", _SPACE.sub(" ", statement).strip())
+
+
+def _parameters(parameters, executemany):
+    # Enough to reproduce the statement without logging whole bulk payloads
+    if executemany:
+        return {"rows": len(parameters), "first": repr(parameters[0])[:500] if parameters else None}
+    return repr(parameters)[:500]
+
+
+def table_scans(plan):
+    # "SCAN t USING INDEX" walks an index and FTS5 tables plan their own lookups
+    return [line for line in plan if line.startswith("SCAN ") and " USING " not in line and " VIRTUAL TABLE " not in line]
+
+
+def explain(statement, parameters):
+    """EXPLAIN QUERY PLAN ``statement`` on a fresh connection."""
+    from app.database import engine
+
+    with engine.connect() as connection:
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    return [row[-1] for row in rows]
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("querylog_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    statements = _current.get()
+    started = conn.info.get("querylog_started")
+    if statements is not None and started:
+        statements.append((statement, parameters, executemany, time.perf_counter() - started.pop()))
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(context):
+    started = context.connection.info.get("querylog_started") if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+def analyse(statements, duration):
+    """Flags and details for one request's ``statements``; empty flags mean nothing to log."""
+    flags = set()
+    shapes = Counter()
+    shape_ms = Counter()
+    slow = []
+    scans = []
+    for statement, parameters, executemany, elapsed in statements:
+        shape = statement_shape(statement)
+        shapes[shape] += 1
+        shape_ms[shape] += elapsed * 1000
+        plan = None
+        if elapsed * 1000 >= config.SLOW_QUERY_MS:
+            flags.add("slow_statement")
+            plan = _explain_safely(statement, parameters, executemany)
+            slow.append({
+                "statement": shape,
+                "parameters": _parameters(parameters, executemany),
+                "duration_ms": round(elapsed * 1000, 3),
+                "plan": plan,
+            })
+        elif config.QUERY_LOG == "development" and not executemany and statement.lstrip()[:6].upper() == "SELECT":
+            if shape not in _plans:
+                _plans[shape] = _explain_safely(statement, parameters, executemany)
+            plan = _plans[shape]
+        if plan and table_scans(plan) and shape not in scans:
+            flags.add("table_scan")
+            scans.append(shape)
+
+    repeated = [
+        {"statement": shape, "count": count, "total_ms": round(shape_ms[shape], 3)}
+        for shape, count in shapes.most_common()
+        if count >= config.N_PLUS_ONE_THRESHOLD
+    ]
+    if repeated:
+        flags.add("n_plus_one")
+    if duration * 1000 >= config.SLOW_REQUEST_MS:
+        flags.add("slow_request")
+    return {
+        "flags": sorted(flags),
+        "statements": len(statements),
+        "sql_ms": round(sum(shape_ms.values()), 3),
+        "repeated": repeated,
+        "slow_statements": slow,
+        "table_scans": scans,
+    }
+
+
+def _explain_safely(statement, parameters, executemany):
+    if executemany or statement.lstrip()[:6].upper() not in ("SELECT", "UPDATE", "DELETE", "INSERT"):
+        return None
+    try:
+        return explain(statement, parameters)
+    except Exception as exc:  # the plan is a diagnostic; never fail the request log over it
+        return [f"EXPLAIN failed: {exc}"]
+
+
+class QueryLogMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        statements = []
+        token = _current.set(statements)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            duration = time.perf_counter() - started
+            _current.reset(token)
+
+        if not statements and duration * 1000 < config.SLOW_REQUEST_MS:
+            return
+        # The response is already sent; the EXPLAINs run in a fresh context so
+        # they aren't counted as this request's statements by app.metrics
+        record = await run_in_threadpool(Context().run, analyse, statements, duration)
+        if record["flags"]:
+            record = {
+                "event": "flagged_request",
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope["query_string"].decode("latin-1"),
+                "route": route_label(scope),
+                "duration_ms": round(duration * 1000, 3),
+                **record,
+            }
+            logger.warning(json.dumps(record, default=str))
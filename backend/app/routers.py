@@ -0,0 +1,71 @@
+import asyncio
+import importlib
+
+from starlette.concurrency import run_in_threadpool
+
+# (prefix, module, tags) of every API router
+ROUTERS = [
+    ("/api/categories", "app.api.categories", ["categories"]),
+    ("/api/examples", "app.api.examples", ["examples"]),
+    ("/api/algorithms", "app.api.algorithms", ["algorithms"]),
+    ("/api/search", "app.api.search", ["search"]),
+    ("/api/sync", "app.api.sync", ["sync"]),
+]
+
+# Paths that need every router: the OpenAPI schema and the docs built from it
+_ALL_ROUTERS_PATHS = ("/openapi.json", "/docs", "/redoc")
+
+
+def include_all(app):
+    for prefix, module, tags in ROUTERS:
+        app.include_router(importlib.import_module(module).router, prefix=prefix, tags=tags)
+
+
+class LazyRouters:
+    """Includes each router into ``app`` the first time a request needs it.
+
+    Keeps the routers' imports (pydantic schemas, route signatures) out of
+    the cold start. A module is imported on the threadpool and included on
+    the event loop, once, however many requests are waiting for it.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.pending = {prefix: (module, tags) for prefix, module, tags in ROUTERS}
+        self._lock = None
+
+    async def load(self, prefixes):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            for prefix in prefixes:
+                if prefix not in self.pending:
+                    continue
+                module, tags = self.pending[prefix]
+                router = (await run_in_threadpool(importlib.import_module, module)).router
+                self.app.include_router(router, prefix=prefix, tags=tags)
+                del self.pending[prefix]
+            # Rebuilt on the next request so it lists the new routes
+            self.app.openapi_schema = None
+
+    async def load_all(self):
+        await self.load(list(self.pending))
+
+    async def ensure(self, path):
+        if path in _ALL_ROUTERS_PATHS:
+            await self.load_all()
+            return
+        needed = [prefix for prefix in self.pending if path == prefix or path.startswith(prefix + "/")]
+        if needed:
+            await self.load(needed)
+
+
+class LazyRoutersMiddleware:
+    def __init__(self, app, routers):
+        self.app = app
+        self.routers = routers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and self.routers.pending:
+            await self.routers.ensure(scope["path"])
+        await self.app(scope, receive, send)
@@ -0,0 +1,255 @@
+"""Warm worker pool that runs stored ``python_code`` for ``POST /api/algorithms/{slug}/run``.
+
+Algorithms, and so their code, can be submitted through the API, so the
+pool is off unless ``SANDBOX_WORKERS`` is set and treats the code as
+hostile. Workers are long-lived ``python -I -S app/sandbox_worker.py``
+processes started with the server, so a run costs a pipe round trip instead
+of an interpreter start. Each confines itself before its first run in
+namespaces of its own, which needs no privileges (no network, an empty
+read-only root, no capabilities, and a pid namespace that hides the server
+and the other workers; see ``app.sandbox_worker``), runs the code with
+restricted builtins and imports, and handles one run at a time under the
+limits in ``app.config``: a wall-clock timer and a CPU-time timer that abort
+the run, RLIMIT_CPU as the uncatchable backstop, RLIMIT_AS for memory, and
+RLIMIT_FSIZE/RLIMIT_NPROC at zero so it can't write to files or fork. If
+workers can't confine themselves (e.g. the kernel doesn't allow unprivileged
+user namespaces) the pool logs why and stays disabled. The pool replaces a worker that overruns its
+limits, dies, breaks the protocol or runs out of memory, and recycles each
+one after ``SANDBOX_MAX_RUNS`` runs.
+
+Stored code is checked for attribute access the workers don't allow,
+compiled once per version (keyed by the sha256 of its text) and sent
+marshalled to each worker the first time that worker needs it; workers
+cache the code objects and execute them in fresh globals per run.
+"""
+import ast
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import marshal
+import os
+import signal
+import string
+import struct
+import sys
+import tempfile
+from functools import lru_cache
+
+import _string
+
+from app import config
+from app.sandbox_worker import FORMAT_METHODS, attribute_denied
+
+logger = logging.getLogger("dsa.sandbox")
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sandbox_worker.py")
+HEADER = struct.Struct(">I")
+# How long past its own wall-clock limit a worker may take before it's killed
+GRACE_SECONDS = 1.0
+START_TIMEOUT_SECONDS = 10.0
+
+
+class SandboxUnavailable(Exception):
+    pass
+
+
+def _format_attributes(template):
+    """Attribute names the replacement fields of a ``str.format`` template read."""
+    try:
+        fields = list(string.Formatter().parse(template))
+    except ValueError:  # .format() would refuse it too
+        return
+    for _, field, spec, _ in fields:
+        if field:
+            yield from (key for is_attribute, key in _string.formatter_field_name_split(field)[1] if is_attribute)
+        if spec:
+            yield from _format_attributes(spec)
+
+
+def _refuse(node, message):
+    raise SyntaxError(message, ("<python_code>", node.lineno, node.col_offset + 1, None))
+
+
+@lru_cache(maxsize=256)
+def compile_code(source):
+    """``(version key, base64 marshalled code object)`` for ``source``; raises SyntaxError.
+
+    Also a SyntaxError: reading or writing an attribute the workers refuse,
+    e.g. ``__globals__`` or ``gi_frame``, which would reach real globals,
+    whether directly, through a class pattern's keywords in ``match`` or
+    through a field of a ``str.format`` template; and calling ``.format``
+    or ``.format_map`` on anything but a string literal.
+    """
+    tree = ast.parse(source, "<python_code>")
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Attribute):
+            names = [node.attr]
+            if node.attr in FORMAT_METHODS:
+                if not (isinstance(node.value, ast.Constant) and isinstance(node.value.value, str)):
+                    _refuse(node, f".{node.attr}() is only allowed on string literals")
+                names.extend(_format_attributes(node.value.value))
+        elif isinstance(node, ast.MatchClass):
+            names = node.kwd_attrs
+        else:
+            continue
+        for name in names:
+            if attribute_denied(name):
+                _refuse(node, f"access to .{name} is not allowed")
+    code = compile(tree, "<python_code>", "exec")
+    return hashlib.sha256(source.encode()).hexdigest(), base64.b64encode(marshal.dumps(code)).decode()
+
+
+def entry_point(slug):
+    # bubble-sort -> bubble_sort
+    return slug.replace("-", "_")
+
+
+class _Worker:
+    def __init__(self, process):
+        self.process = process
+        self.runs = 0
+
+    async def call(self, message):
+        body = json.dumps(message).encode()
+        self.process.stdin.write(HEADER.pack(len(body)) + body)
+        await self.process.stdin.drain()
+        return await self.receive()
+
+    async def receive(self):
+        size = HEADER.unpack(await self.process.stdout.readexactly(HEADER.size))[0]
+        # stdout and result are capped in the worker; anything bigger is a broken worker
+        if size > 16 * config.SANDBOX_MAX_OUTPUT_BYTES + 4096:
+            raise ValueError(f"oversized reply ({size} bytes)")
+        return json.loads(await self.process.stdout.readexactly(size))
+
+    def kill(self):
+        if self.process.returncode is None:
+            self.process.kill()
+
+
+class SandboxPool:
+    def __init__(self, size):
+        self.size = size
+        self.started = False
+        self._idle = asyncio.Queue()
+        self._workers = set()
+        self._tasks = set()
+        self._waiting = 0
+
+    async def start(self):
+        self.started = True
+        await asyncio.gather(*(self._add() for _ in range(self.size)))
+
+    async def close(self):
+        self.started = False
+        for worker in list(self._workers):
+            worker.kill()
+            await worker.process.wait()
+        self._workers.clear()
+        # Replacements in flight only reap their killed worker once stopped
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _spawn(self):
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-I", "-S", WORKER_SCRIPT,
+            str(config.SANDBOX_TIMEOUT_SECONDS), str(config.SANDBOX_CPU_SECONDS),
+            str(config.SANDBOX_MEMORY_MB), str(config.SANDBOX_MAX_OUTPUT_BYTES),
+            str(config.SANDBOX_UID), str(config.SANDBOX_GID),
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL,
+            env={}, cwd=tempfile.gettempdir(),
+        )
+        worker = _Worker(process)
+        try:
+            ready = await asyncio.wait_for(worker.receive(), START_TIMEOUT_SECONDS)
+            if ready.get("status") == "unconfined":
+                raise SandboxUnavailable(f"workers can't confine themselves ({ready.get('error')})")
+            if ready.get("status") != "ready":
+                raise RuntimeError(f"unexpected greeting {ready!r}")
+        except BaseException:
+            worker.kill()
+            raise
+        return worker
+
+    async def _add(self):
+        while self.started:
+            try:
+                worker = await self._spawn()
+            except SandboxUnavailable as exc:
+                # Retrying can't help; never run code in an unconfined worker
+                if self.started:
+                    logger.error("sandbox disabled: %s", exc)
+                    self.started = False
+                return
+            except Exception:
+                logger.exception("sandbox worker failed to start")
+                await asyncio.sleep(1)
+                continue
+            if not self.started:
+                worker.kill()
+                return
+            self._workers.add(worker)
+            self._idle.put_nowait(worker)
+            return
+
+    def _retire(self, worker):
+        worker.kill()
+        self._workers.discard(worker)
+
+        async def replace():
+            await worker.process.wait()
+            await self._add()
+
+        task = asyncio.ensure_future(replace())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _call(self, worker, message, code):
+        worker.runs += 1
+        reply = await worker.call(message)
+        if reply.get("status") == "uncached":
+            reply = await worker.call({**message, "code": code})
+        return reply
+
+    async def run(self, slug, source, args, kwargs):
+        """Run the ``slug`` entry function of ``source`` on one worker; returns the worker's reply."""
+        if not self.started:
+            raise SandboxUnavailable("The sandbox is disabled")
+        key, code = compile_code(source)
+        if self._waiting >= config.SANDBOX_MAX_PENDING:
+            raise SandboxUnavailable("All sandbox workers are busy")
+        self._waiting += 1
+        try:
+            worker = await asyncio.wait_for(self._idle.get(), config.SANDBOX_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            raise SandboxUnavailable("No sandbox worker became free in time") from None
+        finally:
+            self._waiting -= 1
+
+        message = {"key": key, "code": None, "entry": entry_point(slug), "args": args, "kwargs": kwargs}
+        retire = True
+        try:
+            reply = await asyncio.wait_for(self._call(worker, message, code), config.SANDBOX_TIMEOUT_SECONDS + GRACE_SECONDS)
+        except asyncio.TimeoutError:
+            return {"status": "timeout", "error": f"no reply within {config.SANDBOX_TIMEOUT_SECONDS}s"}
+        except (OSError, ValueError, asyncio.IncompleteReadError):
+            try:
+                await asyncio.wait_for(worker.process.wait(), GRACE_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            if worker.process.returncode == -signal.SIGXCPU:
+                return {"status": "cpu_limit", "error": "the worker exceeded its CPU limit"}
+            return {"status": "crashed", "error": f"the worker exited (code {worker.process.returncode})"}
+        else:
+            # MemoryError may have left the worker in a bad state; replace it anyway
+            retire = reply.get("status") == "memory_limit" or worker.runs >= config.SANDBOX_MAX_RUNS
+            return reply
+        finally:
+            if retire:
+                self._retire(worker)
+            else:
+                self._idle.put_nowait(worker)
+
+
+pool = SandboxPool(config.SANDBOX_WORKERS)
@@ -0,0 +1,347 @@
+"""Sandbox worker process; see ``app.sandbox``.
+
+Run by the pool as ``python -I -S sandbox_worker.py <timeout> <cpu> <memory_mb> <max_output> <uid> <gid>``.
+It imports only the standard library, including every module stored code
+may import, then confines itself before it reads any request: new user,
+mount, network (so no network), IPC and pid namespaces, an empty read-only
+tmpfs as its root, no capabilities and no_new_privs. The code runs in pid 2
+of the worker's own pid namespace, so it can't see, signal or trace other
+workers or the server. User namespaces need no privileges, so the server
+doesn't have to start as root; if it does, the worker first switches to the
+unprivileged ``uid``/``gid`` (root is exempt from RLIMIT_NPROC). If any step
+fails it replies ``{"status": "unconfined"}`` and exits instead of
+``{"status": "ready"}``. It then applies its resource limits and answers
+length-prefixed JSON requests on its stdin/stdout pipes one at a time:
+
+    {"key", "code" (base64 marshalled code object, or null), "entry", "args", "kwargs"}
+    -> {"status", "result", "stdout", "error", "duration_ms"}
+
+A request for a code object it hasn't cached gets ``{"status": "uncached"}``
+so the pool can resend it with ``code``.
+
+Stored code runs with a whitelist of builtins and can import only the
+names in ``ALLOWED_IMPORTS``, through proxies that expose nothing else of
+the module. These Python-level restrictions only narrow what the code can
+reach; the confinement above is what holds if they are bypassed.
+"""
+import base64
+import builtins
+import ctypes
+import errno
+import importlib
+import io
+import json
+import marshal
+import math
+import os
+import resource
+import signal
+import struct
+import sys
+import time
+import types
+from collections import OrderedDict
+
+HEADER = struct.Struct(">I")
+CODE_CACHE_SIZE = 256
+
+CLONE_NEWNS = 0x00020000
+CLONE_NEWIPC = 0x08000000
+CLONE_NEWUSER = 0x10000000
+CLONE_NEWPID = 0x20000000
+CLONE_NEWNET = 0x40000000
+MS_RDONLY, MS_NOSUID, MS_NODEV, MS_NOEXEC = 1, 2, 4, 8
+MS_REC = 0x4000
+MS_PRIVATE = 0x40000
+PR_SET_PDEATHSIG = 1
+PR_SET_DUMPABLE = 4
+PR_CAPBSET_DROP = 24
+PR_SET_NO_NEW_PRIVS = 38
+CAPABILITY_VERSION_3 = 0x20080522
+# What the worker's own uid and gid map to inside its user namespace
+NAMESPACE_ID = 65534
+
+# Module -> importable names, or None for every public name that isn't itself
+# a module. Left out: anything that evaluates strings or resolves dotted
+# attribute paths (typing.get_type_hints, string.Formatter, operator.attrgetter)
+ALLOWED_IMPORTS = {
+    "bisect": None,
+    "collections": ("ChainMap", "Counter", "OrderedDict", "defaultdict", "deque", "namedtuple"),
+    "copy": ("copy", "deepcopy"),
+    "functools": ("cache", "cmp_to_key", "lru_cache", "partial", "reduce", "total_ordering"),
+    "heapq": None,
+    "itertools": None,
+    "math": None,
+    "random": None,
+    "re": None,
+    "statistics": None,
+    "string": ("ascii_letters", "ascii_lowercase", "ascii_uppercase", "digits", "hexdigits",
+               "octdigits", "printable", "punctuation", "whitespace"),
+    "typing": ("Any", "Callable", "Deque", "Dict", "FrozenSet", "Iterable", "Iterator", "List",
+               "Optional", "Sequence", "Set", "Tuple", "Union"),
+}
+SAFE_BUILTINS = (
+    "__build_class__", "abs", "all", "any", "ascii", "bin", "bool", "bytearray", "bytes", "callable",
+    "chr", "classmethod", "complex", "dict", "dir", "divmod", "enumerate", "filter", "float", "format",
+    "frozenset", "hash", "hex", "id", "int", "isinstance", "issubclass", "iter", "len", "list", "map",
+    "max", "memoryview", "min", "next", "object", "oct", "ord", "pow", "print", "property", "range",
+    "repr", "reversed", "round", "set", "slice", "sorted", "staticmethod", "str", "sum", "super",
+    "tuple", "type", "zip", "Ellipsis", "NotImplemented",
+)
+# Dunder attributes stored code may use; every other one is refused, and so
+# are the frame and code attributes that lead back to real globals
+ALLOWED_DUNDERS = frozenset({"__class__", "__doc__", "__init__", "__name__", "__qualname__"})
+DENIED_ATTRIBUTES = frozenset({
+    "ag_code", "ag_frame", "cr_code", "cr_frame", "f_back", "f_builtins", "f_code", "f_globals",
+    "f_locals", "gi_code", "gi_frame", "tb_frame", "tb_next",
+})
+# str.format and format_map resolve dotted attribute paths from the template,
+# so only string literals, whose fields the pool checks, may call them
+FORMAT_METHODS = frozenset({"format", "format_map"})
+
+
+def attribute_denied(name):
+    """Whether stored code may not read or write the attribute ``name``; also used by the pool's check."""
+    if name.startswith("__") and name.endswith("__"):
+        return name not in ALLOWED_DUNDERS
+    return name in DENIED_ATTRIBUTES
+
+
+# BaseException, so an ``except Exception`` in the stored code can't swallow them
+class TimeLimit(BaseException):
+    pass
+
+
+class CPULimit(BaseException):
+    pass
+
+
+def _raise(exc_type):
+    def handler(signum, frame):
+        raise exc_type()
+    return handler
+
+
+def _check_attribute(name):
+    if isinstance(name, str) and (attribute_denied(name) or name in FORMAT_METHODS):
+        raise AttributeError(f"access to {name!r} is not allowed")
+
+
+def _getattr(obj, name, *default):
+    _check_attribute(name)
+    return getattr(obj, name, *default)
+
+
+def _hasattr(obj, name):
+    _check_attribute(name)
+    return hasattr(obj, name)
+
+
+def _setattr(obj, name, value):
+    _check_attribute(name)
+    setattr(obj, name, value)
+
+
+def _module_proxy(module, names):
+    if names is None:
+        names = [name for name, value in vars(module).items()
+                 if not name.startswith("_") and not isinstance(value, types.ModuleType)]
+    return types.SimpleNamespace(**{name: getattr(module, name) for name in names})
+
+
+def restricted_builtins():
+    """The ``__builtins__`` stored code runs with; imports every allowed module up front."""
+    modules = {name: _module_proxy(importlib.import_module(name), names) for name, names in ALLOWED_IMPORTS.items()}
+
+    def restricted_import(name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name not in modules:
+            raise ImportError(f"import of {name!r} is not allowed")
+        # A copy, so a run that reassigns a module attribute can't affect the next one
+        return types.SimpleNamespace(**vars(modules[name]))
+
+    allowed = {name: getattr(builtins, name) for name in SAFE_BUILTINS}
+    allowed.update((name, value) for name, value in vars(builtins).items()
+                   if isinstance(value, type) and issubclass(value, BaseException))
+    allowed.update(__import__=restricted_import, getattr=_getattr, hasattr=_hasattr, setattr=_setattr)
+    return allowed
+
+
+def _confine(uid, gid):
+    """Cut this process off from the network, the filesystem and other processes; raises OSError.
+
+    Returns in a grandchild, pid 2 of a new pid namespace, with no
+    capabilities left. This process and the namespace's init (pid 1, which
+    ignores signals like RLIMIT_CPU's SIGXCPU, so it can't run the code)
+    only wait for it and exit the way it did.
+    """
+    libc = ctypes.CDLL(None, use_errno=True)
+
+    def check(result, step):
+        if result != 0:
+            error = ctypes.get_errno()
+            raise OSError(error, f"{step}: {os.strerror(error)}")
+
+    def split():
+        pid = os.fork()
+        if pid == 0:
+            # Don't outlive the parent, e.g. when the pool kills the worker
+            check(libc.prctl(PR_SET_PDEATHSIG, signal.SIGKILL, 0, 0, 0), "prctl")
+            return
+        code = os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1])
+        if code > 128:  # a signal, relayed by pid 1
+            code = 128 - code
+        if code < 0 and os.getpid() != 1:
+            signal.signal(-code, signal.SIG_DFL)
+            os.kill(os.getpid(), -code)
+        os._exit(128 - code if code < 0 else code)
+
+    if os.geteuid() == 0:
+        if uid == 0 or gid == 0:
+            raise OSError("the sandbox uid and gid must not be root")
+        os.setgroups([])
+        os.setgid(gid)
+        os.setuid(uid)
+        # setuid() left this process undumpable, which locks it out of its own /proc files
+        check(libc.prctl(PR_SET_DUMPABLE, 1, 0, 0, 0), "prctl")
+    outer_uid, outer_gid = os.getuid(), os.getgid()
+    check(libc.unshare(CLONE_NEWUSER | CLONE_NEWNS | CLONE_NEWNET | CLONE_NEWIPC | CLONE_NEWPID), "unshare")
+    for name, value in (("setgroups", "deny"), ("uid_map", f"{NAMESPACE_ID} {outer_uid} 1"),
+                        ("gid_map", f"{NAMESPACE_ID} {outer_gid} 1")):
+        with open(f"/proc/self/{name}", "w") as file:
+            file.write(value)
+    # Keep the mounts below out of the server's namespace
+    check(libc.mount(b"none", b"/", None, MS_REC | MS_PRIVATE, None), "mount --make-rprivate /")
+    jail = os.getcwd().encode()
+    check(libc.mount(b"tmpfs", jail, b"tmpfs", MS_RDONLY | MS_NOSUID | MS_NODEV | MS_NOEXEC, b"size=4k,mode=0555"),
+          "mount tmpfs")
+    os.chroot(jail)
+    os.chdir("/")
+    split()  # pid 1 of the new pid namespace
+    split()  # pid 2, which runs the code
+
+    # Every capability the user namespace granted, down to the bounding set
+    cap = 0
+    while libc.prctl(PR_CAPBSET_DROP, cap, 0, 0, 0) == 0:
+        cap += 1
+    if ctypes.get_errno() != errno.EINVAL or cap == 0:  # EINVAL: past the last capability
+        check(-1, "prctl PR_CAPBSET_DROP")
+    header = (ctypes.c_uint32 * 2)(CAPABILITY_VERSION_3, 0)
+    check(libc.capset(header, (ctypes.c_uint32 * 6)()), "capset")
+    check(libc.prctl(PR_SET_NO_NEW_PRIVS, 1, 0, 0, 0), "prctl")
+
+
+def _cpu_used():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _read(stream):
+    header = stream.read(HEADER.size)
+    if len(header) < HEADER.size:
+        return None
+    return json.loads(stream.read(HEADER.unpack(header)[0]))
+
+
+def _write(stream, message):
+    body = json.dumps(message, default=repr).encode()
+    stream.write(HEADER.pack(len(body)) + body)
+    stream.flush()
+
+
+def run(request, codes, allowed_builtins, timeout, cpu_seconds):
+    key = request["key"]
+    code = codes.get(key)
+    if code is None:
+        if request.get("code") is None:
+            return {"status": "uncached"}
+        code = codes[key] = marshal.loads(base64.b64decode(request["code"]))
+        if len(codes) > CODE_CACHE_SIZE:
+            codes.popitem(last=False)
+    codes.move_to_end(key)
+
+    status, result, error = "ok", None, None
+    stdout = io.StringIO()
+    # Fresh globals on every run, so no state leaks between requests
+    namespace = {"__name__": "__sandbox__", "__builtins__": dict(allowed_builtins)}
+    # RLIMIT_CPU kills the process if the code swallows CPULimit and keeps going
+    soft = math.ceil(_cpu_used() + cpu_seconds) + 1
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, resource.RLIM_INFINITY))
+    started = time.perf_counter()
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    signal.setitimer(signal.ITIMER_PROF, cpu_seconds)
+    try:
+        sys.stdout = io.StringIO()  # the module's own example output is discarded
+        exec(code, namespace)
+        function = namespace.get(request["entry"])
+        if not callable(function):
+            raise NameError(f"no function {request['entry']}() in the stored code")
+        sys.stdout = stdout
+        value = function(*request["args"], **request["kwargs"])
+        # Converted here, under the limits, since default=repr can run the code's
+        # own __repr__; what comes back is plain JSON the pool can always send on
+        try:
+            result = json.loads(json.dumps(value, default=repr, allow_nan=False))
+        except (TypeError, ValueError) as exc:  # e.g. tuple keys, NaN or a circular result
+            raise ValueError(f"result is not serializable: {exc}") from None
+    except TimeLimit:
+        status = "timeout"
+    except CPULimit:
+        status = "cpu_limit"
+    except MemoryError:
+        status = "memory_limit"
+    except BaseException as exc:
+        status, error = "error", f"{type(exc).__name__}: {exc}"
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        sys.stdout = sys.__stdout__
+    return {
+        "status": status,
+        "result": result,
+        "stdout": stdout.getvalue(),
+        "error": error,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+
+
+def main():
+    timeout, cpu_seconds = float(sys.argv[1]), float(sys.argv[2])
+    memory_mb, max_output = int(sys.argv[3]), int(sys.argv[4])
+    uid, gid = int(sys.argv[5]), int(sys.argv[6])
+
+    # Move the protocol pipes off fds 0 and 1, so the stored code's prints or
+    # writes to those fds can't corrupt the replies
+    requests = os.fdopen(os.dup(0), "rb")
+    replies = os.fdopen(os.dup(1), "wb")
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    os.close(devnull)
+
+    allowed_builtins = restricted_builtins()
+    try:
+        _confine(uid, gid)
+    except OSError as exc:
+        _write(replies, {"status": "unconfined", "error": str(exc)})
+        return
+    resource.setrlimit(resource.RLIMIT_AS, (memory_mb * 1024 * 1024,) * 2)
+    resource.setrlimit(resource.RLIMIT_FSIZE, (0, 0))
+    resource.setrlimit(resource.RLIMIT_NPROC, (0, 0))
+    signal.signal(signal.SIGALRM, _raise(TimeLimit))
+    signal.signal(signal.SIGPROF, _raise(CPULimit))
+
+    codes = OrderedDict()
+    _write(replies, {"status": "ready"})
+    while True:
+        request = _read(requests)
+        if request is None:
+            return
+        reply = run(request, codes, allowed_builtins, timeout, cpu_seconds)
+        reply["stdout"] = reply.get("stdout", "")[:max_output]
+        if len(json.dumps(reply.get("result"))) > max_output:
+            reply.update(status="error", result=None, error=f"result is larger than {max_output} bytes")
+        _write(replies, reply)
+
+
+if __name__ == "__main__":
+    main()
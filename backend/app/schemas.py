@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, Field, model_validator
+from typing import Any, Dict, Optional, List
 from enum import Enum
 
 class CategoryType(str, Enum):
@@ -31,7 +31,8 @@ class Category(CategoryBase):
 class ExampleBase(BaseModel):
     title: str
     slug: str
-    category_id: int
+    # Nullable like the column; still required, so a missing category is explicit
+    category_id: Optional[int]
     description: Optional[str] = None
     explanation: Optional[str] = None
     time_complexity: Optional[str] = None
@@ -52,6 +53,18 @@ class Example(ExampleBase):
     class Config:
         from_attributes = True
 
+class ExampleSummary(BaseModel):
+    id: int
+    title: str
+    slug: str
+    category_id: Optional[int]
+    time_complexity: Optional[str] = None
+    space_complexity: Optional[str] = None
+    difficulty: DifficultyLevel = DifficultyLevel.BEGINNER
+
+    class Config:
+        from_attributes = True
+
 class AlgorithmBase(BaseModel):
     name: str
     slug: str
@@ -77,3 +90,92 @@ class Algorithm(AlgorithmBase):
     
     class Config:
         from_attributes = True
+
+class AlgorithmSummary(BaseModel):
+    id: int
+    name: str
+    slug: str
+    category: str
+    time_complexity_best: Optional[str] = None
+    time_complexity_average: Optional[str] = None
+    time_complexity_worst: Optional[str] = None
+    space_complexity: Optional[str] = None
+    difficulty: DifficultyLevel = DifficultyLevel.BEGINNER
+
+    class Config:
+        from_attributes = True
+
+class BatchLookup(BaseModel):
+    ids: Optional[List[int]] = Field(default=None, max_length=500)
+    slugs: Optional[List[str]] = Field(default=None, max_length=500)
+
+    @model_validator(mode="after")
+    def check_one_key(self):
+        if (self.ids is None) == (self.slugs is None):
+            raise ValueError("Provide exactly one of 'ids' or 'slugs'")
+        return self
+
+    @property
+    def key(self):
+        return "id" if self.ids is not None else "slug"
+
+    @property
+    def values(self):
+        return self.ids if self.ids is not None else self.slugs
+
+class BulkResult(BaseModel):
+    index: int
+    slug: str
+    id: int
+    status: str  # "created" or "updated"
+
+class AlgorithmRun(BaseModel):
+    # Positional and keyword arguments for the algorithm's entry function
+    args: List[Any] = []
+    kwargs: Dict[str, Any] = {}
+
+class AlgorithmRunResult(BaseModel):
+    status: str  # "ok", "error", "timeout", "cpu_limit", "memory_limit" or "crashed"
+    result: Any = None
+    stdout: str = ""
+    error: Optional[str] = None
+    duration_ms: Optional[float] = None
+
+class SearchKind(str, Enum):
+    ALGORITHM = "algorithm"
+    EXAMPLE = "example"
+
+class SearchResult(BaseModel):
+    kind: SearchKind
+    id: int
+    slug: str
+    title: str
+    snippet: str
+    rank: float
+
+    class Config:
+        from_attributes = True
+
+class CategoryPage(Category):
+    examples: List[Example] = []
+    algorithms: List[Algorithm] = []
+
+class CategoryChanges(BaseModel):
+    upserted: List[Category] = []
+    deleted: List[int] = []
+
+class ExampleChanges(BaseModel):
+    upserted: List[Example] = []
+    deleted: List[int] = []
+
+class AlgorithmChanges(BaseModel):
+    upserted: List[Algorithm] = []
+    deleted: List[int] = []
+
+class SyncChanges(BaseModel):
+    version: int
+    reset: bool = False
+    has_more: bool = False
+    categories: CategoryChanges
+    examples: ExampleChanges
+    algorithms: AlgorithmChanges
@@ -0,0 +1,70 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import Session
+
+# Columns indexed per table; the FTS tables are external-content tables over
+# the catalog rows, kept in sync by triggers so every write path (single-row
+# handlers and bulk statements alike) updates the index incrementally.
+SEARCH_INDEXES = {
+    "algorithms": ("name", "description", "explanation", "use_cases", "pseudocode", "python_code", "javascript_code"),
+    "examples": ("title", "description", "explanation", "use_cases", "code_example"),
+}
+
+# bm25 weights, in column order: titles count most, code least
+SEARCH_WEIGHTS = {
+    "algorithms": (10.0, 4.0, 1.0, 2.0, 0.5, 0.5, 0.5),
+    "examples": (10.0, 4.0, 1.0, 2.0, 0.5),
+}
+
+def _ddl(table, columns):
+    fts = f"{table}_fts"
+    cols = ", ".join(columns)
+    new = ", ".join(f"new.{column}" for column in columns)
+    old = ", ".join(f"old.{column}" for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({cols}, content='{table}', content_rowid='id', tokenize='porter unicode61')",
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); END",
+        f"CREATE TRIGGER {fts}_au AFTER UPDATE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new}); END",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    ]
+
+def create_search_index(connection):
+    """Create the FTS5 tables and sync triggers if missing, indexing existing rows once."""
+    existing = set(inspect(connection).get_table_names())
+    for table, columns in SEARCH_INDEXES.items():
+        if f"{table}_fts" not in existing:
+            for statement in _ddl(table, columns):
+                connection.exec_driver_sql(statement)
+
+def match_expression(query: str):
+    """Quote every term so user input can't inject FTS5 syntax; the last term matches as a prefix."""
+    terms = ['"' + term.replace('"', '""') + '"' for term in query.split()]
+    if not terms:
+        return None
+    terms[-1] += "*"
+    return " ".join(terms)
+
+def _select(table, kind, title):
+    fts = f"{table}_fts"
+    weights = ", ".join(str(weight) for weight in SEARCH_WEIGHTS[table])
+    return (
+        f"SELECT '{kind}' AS kind, t.id AS id, t.slug AS slug, t.{title} AS title, "
+        f"snippet({fts}, -1, '<mark>', '</mark>', '…', 16) AS snippet, bm25({fts}, {weights}) AS rank "
+        f"FROM {fts} JOIN {table} t ON t.id = {fts}.rowid WHERE {fts} MATCH :match"
+    )
+
+def search(db: Session, query: str, kind: str = None, limit: int = 20):
+    match = match_expression(query)
+    if match is None:
+        return []
+    selects = []
+    if kind in (None, "algorithm"):
+        selects.append(_select("algorithms", "algorithm", "name"))
+    if kind in (None, "example"):
+        selects.append(_select("examples", "example", "title"))
+    statement = text(" UNION ALL ".join(selects) + " ORDER BY rank LIMIT :limit")
+    return db.execute(statement, {"match": match, "limit": limit}).all()
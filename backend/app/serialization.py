@@ -0,0 +1,68 @@
+import json
+from functools import lru_cache
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app import config
+from app.projection import projected_schema
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib encoder
+    orjson = None
+
+
+def dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+# Bounded like projected_schema: a class it evicts and rebuilds is a new key here
+@lru_cache(maxsize=256)
+def _adapter(schema):
+    return TypeAdapter(schema)
+
+
+def encode(schema, data):
+    adapter = _adapter(schema)
+    return adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+
+
+@lru_cache(maxsize=256)
+def schema_encoder(schema):
+    """Encoder that validates ORM objects or rows through ``schema``."""
+    adapter = _adapter(schema)
+    return lambda data: adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+
+
+@lru_cache(maxsize=256)
+def row_encoder(fields, many):
+    """Encoder that zips row tuples with ``fields`` and dumps them without validation.
+
+    Only valid for rows selected with ``fields`` as their leading columns;
+    trailing columns (e.g. keyset columns) are dropped by ``zip``.
+    """
+    if many:
+        return lambda rows: dumps([dict(zip(fields, row)) for row in rows])
+    return lambda row: dumps(dict(zip(fields, row)))
+
+
+def query_fields(schema, fields):
+    """Columns a read route should select; in fast mode every read is a column query."""
+    if fields is None and config.FAST_SERIALIZATION:
+        return tuple(schema.model_fields)
+    return fields
+
+
+def response_encoder(schema, fields, many=False):
+    """Encoder for a read route: row tuples straight to JSON in fast mode, pydantic otherwise.
+
+    The catalog rows were validated by the write handlers, so the fast path
+    skips validating them again on the way out.
+    """
+    if config.FAST_SERIALIZATION:
+        return row_encoder(query_fields(schema, fields), many)
+    schema = projected_schema(schema, fields)
+    return schema_encoder(List[schema] if many else schema)
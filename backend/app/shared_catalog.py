@@ -0,0 +1,426 @@
+"""Catalog snapshot shared by every uvicorn worker through memory-mapped files.
+
+``<dir>/control`` holds the current generation as a little-endian u64 and is
+mapped by every worker, so checking for changes is a plain memory read.
+``<dir>/catalog-<generation>.bin`` holds the snapshot; it is written once by
+whichever worker handled the write and mapped read-only by all of them.
+
+Workers serve reads straight from the mapping (``MappedSnapshot``): each
+row is stored as its own JSON array, found through an offset table, and
+lookups, category filters and pages are binary searches over sorted key
+arrays in the file. A request decodes only the rows it returns, so the
+catalog lives once in the page cache and a worker's own memory doesn't grow
+with the catalog.
+
+File layout: header, a JSON directory of ``name -> [offset, length]``, then
+8-byte aligned sections. Integer sections are native-endian int64 arrays
+(the file never leaves the host); a string column is an ``.offsets`` int64
+array plus a ``.data`` blob of UTF-8.
+"""
+import bisect
+import fcntl
+import glob
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from app import catalog, config
+from app.cache import response_cache
+from app.catalog import AlgorithmRow, CategoryRow, ExampleRow, _project
+from app.database import SessionLocal
+from app.pagination import decode_cursor
+
+MAGIC = b"DSACAT02"
+HEADER = struct.Struct("<8sQQ32s")  # magic, generation, directory length, sha256 of the rest of the file
+CONTROL = struct.Struct("<Q")
+
+# Stand-ins for NULL keys; SQLite sorts NULL first
+_NULL_INT = -(2 ** 63)
+_NULL_STR = ""
+
+# Row storage order and row type of each table
+TABLES = {
+    "categories": CategoryRow,
+    "examples": ExampleRow,
+    "algorithms": AlgorithmRow,
+}
+
+# (table, index) -> key columns as (field, type). "main" is the storage order
+# the list routes page through; the others serve lookups and category filters.
+INDEXES = {
+    ("categories", "main"): (("order", int), ("id", int)),
+    ("categories", "id"): (("id", int),),
+    ("categories", "slug"): (("slug", str),),
+    ("examples", "main"): (("id", int),),
+    ("examples", "slug"): (("slug", str),),
+    ("examples", "category"): (("category_id", int), ("id", int)),
+    ("algorithms", "main"): (("id", int),),
+    ("algorithms", "slug"): (("slug", str),),
+    ("algorithms", "category"): (("category", str), ("id", int)),
+}
+
+_control = None
+_generation = 0
+_sync_lock = threading.Lock()
+
+
+def _path(name):
+    return os.path.join(config.CATALOG_SHARED_DIR, name)
+
+
+def _data_path(generation):
+    return _path(f"catalog-{generation}.bin")
+
+
+def _open_control():
+    global _control
+    if _control is None:
+        os.makedirs(config.CATALOG_SHARED_DIR, exist_ok=True)
+        fd = os.open(_path("control"), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size < CONTROL.size:
+                os.ftruncate(fd, CONTROL.size)
+            _control = mmap.mmap(fd, CONTROL.size)
+        finally:
+            os.close(fd)
+    return _control
+
+
+def shared_generation():
+    return CONTROL.unpack_from(_open_control())[0]
+
+
+class _WriterLock:
+    """Cross-process lock serialising snapshot writers."""
+
+    def __enter__(self):
+        os.makedirs(config.CATALOG_SHARED_DIR, exist_ok=True)
+        self._file = open(_path("lock"), "w")
+        fcntl.flock(self._file, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc):
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
+
+
+def _key(value, kind):
+    if value is None:
+        return _NULL_INT if kind is int else _NULL_STR
+    return value
+
+
+def _encode(tables):
+    """File body (everything after the header) for ``{table: rows}``."""
+    sections = {}
+
+    def ints(name, values):
+        sections[name] = array("q", values).tobytes()
+
+    def strings(name, values):
+        encoded = [value.encode() for value in values]
+        offsets = [0]
+        for value in encoded:
+            offsets.append(offsets[-1] + len(value))
+        ints(f"{name}.offsets", offsets)
+        sections[f"{name}.data"] = b"".join(encoded)
+
+    for table, rows in tables.items():
+        encoded = [json.dumps(list(row), separators=(",", ":")).encode() for row in rows]
+        offsets = [0]
+        for row in encoded:
+            offsets.append(offsets[-1] + len(row))
+        ints(f"{table}.offsets", offsets)
+        sections[f"{table}.rows"] = b"".join(encoded)
+
+    for (table, index), columns in INDEXES.items():
+        rows = tables[table]
+        keys = [tuple(_key(getattr(row, field), kind) for field, kind in columns) for row in rows]
+        order = sorted(range(len(rows)), key=keys.__getitem__)
+        ints(f"{table}.{index}.rows", order)
+        for position, (field, kind) in enumerate(columns):
+            values = [keys[i][position] for i in order]
+            (ints if kind is int else strings)(f"{table}.{index}.{field}", values)
+
+    directory, chunks, position = {}, [], 0
+    for name, data in sections.items():
+        padding = -position % 8
+        chunks.append(b"\0" * padding)
+        directory[name] = [position + padding, len(data)]
+        chunks.append(data)
+        position += padding + len(data)
+    directory = json.dumps(directory, separators=(",", ":")).encode()
+    body = directory + b"\0" * (-(HEADER.size + len(directory)) % 8) + b"".join(chunks)
+    return len(directory), body, hashlib.sha256(body).digest()
+
+
+class _Strings:
+    """Read-only sequence over a string column."""
+
+    __slots__ = ("offsets", "data")
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+
+class _Index:
+    """Key tuples of one index as a sequence, so ``bisect`` can search it in place."""
+
+    __slots__ = ("rows", "columns")
+
+    def __init__(self, rows, columns):
+        self.rows = rows
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, i):
+        return tuple(column[i] for column in self.columns)
+
+    def find(self, key):
+        """Row number of the unique entry ``key``, or ``None``."""
+        try:
+            i = bisect.bisect_left(self, key)
+        except TypeError:  # a key of the wrong type can't match
+            return None
+        return self.rows[i] if i < len(self) and self[i] == key else None
+
+    def group(self, value):
+        """``(lo, hi)`` entries whose first key column is ``value``."""
+        return bisect.bisect_left(self, (value,)), bisect.bisect_right(self, (value, float("inf")))
+
+
+class MappedSnapshot:
+    """Catalog snapshot read straight from a mapped ``catalog-<generation>.bin``.
+
+    Has the same read methods as ``catalog.CatalogSnapshot``; rows are decoded
+    from the mapping on each call rather than held in memory.
+    """
+
+    def __init__(self, generation, data):
+        magic, stored_generation, directory_length, digest = HEADER.unpack_from(data)
+        if magic != MAGIC or stored_generation != generation:
+            raise ValueError(f"corrupt catalog snapshot {generation}")
+        self.version = generation
+        self.loaded_at = time.time()
+        self.digest = digest
+        self.size = len(data)
+        directory = json.loads(data[HEADER.size:HEADER.size + directory_length])
+        base = HEADER.size + directory_length
+        base += -base % 8
+        view = memoryview(data)
+
+        def section(name):
+            offset, length = directory[name]
+            return view[base + offset:base + offset + length]
+
+        def column(name, kind):
+            if kind is int:
+                return section(name).cast("q")
+            return _Strings(section(f"{name}.offsets").cast("q"), section(f"{name}.data"))
+
+        self._rows = {table: (section(f"{table}.offsets").cast("q"), section(f"{table}.rows")) for table in TABLES}
+        self._indexes = {
+            (table, index): _Index(section(f"{table}.{index}.rows").cast("q"),
+                                   [column(f"{table}.{index}.{field}", kind) for field, kind in columns])
+            for (table, index), columns in INDEXES.items()
+        }
+
+    def _row(self, table, number):
+        if number is None:
+            return None
+        offsets, rows = self._rows[table]
+        return TABLES[table]._make(json.loads(bytes(rows[offsets[number]:offsets[number + 1]])))
+
+    def _find(self, table, index, key):
+        return self._row(table, self._indexes[table, index].find((key,)))
+
+    def _page(self, table, index, lo, hi, prefix, skip, limit, cursor):
+        """Rows ``lo..hi`` of an index from ``skip`` or after ``cursor``, like ``catalog._page``."""
+        entries = self._indexes[table, index]
+        if cursor is None:
+            start = lo + max(skip, 0)  # SQLite ignores a negative OFFSET
+        else:
+            values = decode_cursor(cursor, tuple(kind for _, kind in INDEXES[table, index][len(prefix):]))
+            try:
+                start = bisect.bisect_right(entries, prefix + tuple(values), lo, hi)
+            except TypeError:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+        end = hi if limit is None or limit < 0 else min(hi, start + limit)
+        return [self._row(table, entries.rows[i]) for i in range(start, end)]
+
+    def _list(self, table, group, skip, limit, cursor):
+        if group is None:
+            return self._page(table, "main", 0, len(self._indexes[table, "main"]), (), skip, limit, cursor)
+        lo, hi = self._indexes[table, "category"].group(group)
+        return self._page(table, "category", lo, hi, (group,), skip, limit, cursor)
+
+    # Categories
+
+    def get_categories(self, skip=0, limit=100, cursor=None, fields=None):
+        return _project(self._list("categories", None, skip, limit, cursor), CategoryRow, fields, ("order", "id"))
+
+    def get_category(self, category_id, fields=None):
+        return catalog.CatalogSnapshot._one(self._find("categories", "id", category_id), CategoryRow, fields)
+
+    def get_category_by_slug(self, slug, fields=None):
+        return catalog.CatalogSnapshot._one(self._find("categories", "slug", slug), CategoryRow, fields)
+
+    def get_category_page(self, slug):
+        category = self._find("categories", "slug", slug)
+        if category is None:
+            return None
+        examples = self._list("examples", category.id, 0, None, None)
+        algorithms = self._list("algorithms", category.slug, 0, None, None)
+        return {**category._asdict(), "examples": examples, "algorithms": algorithms}
+
+    def get_categories_by_keys(self, key, values, fields=None):
+        return self._by_keys("categories", CategoryRow, key, values, fields)
+
+    # Examples
+
+    def get_examples(self, skip=0, limit=100, category_id=None, cursor=None, fields=None):
+        return _project(self._list("examples", category_id or None, skip, limit, cursor), ExampleRow, fields)
+
+    def get_example(self, example_id, fields=None):
+        return catalog.CatalogSnapshot._one(self._find("examples", "main", example_id), ExampleRow, fields)
+
+    def get_example_by_slug(self, slug, fields=None):
+        return catalog.CatalogSnapshot._one(self._find("examples", "slug", slug), ExampleRow, fields)
+
+    def get_examples_by_keys(self, key, values, fields=None):
+        return self._by_keys("examples", ExampleRow, key, values, fields)
+
+    # Algorithms
+
+    def get_algorithms(self, skip=0, limit=100, category=None, cursor=None, fields=None):
+        return _project(self._list("algorithms", category or None, skip, limit, cursor), AlgorithmRow, fields)
+
+    def get_algorithm(self, algorithm_id, fields=None):
+        return catalog.CatalogSnapshot._one(self._find("algorithms", "main", algorithm_id), AlgorithmRow, fields)
+
+    def get_algorithm_by_slug(self, slug, fields=None):
+        return catalog.CatalogSnapshot._one(self._find("algorithms", "slug", slug), AlgorithmRow, fields)
+
+    def get_algorithms_by_keys(self, key, values, fields=None):
+        return self._by_keys("algorithms", AlgorithmRow, key, values, fields)
+
+    def _by_keys(self, table, row_type, key, values, fields):
+        index = "slug" if key == "slug" else ("id" if table == "categories" else "main")
+        rows = [self._find(table, index, value) for value in dict.fromkeys(values)]
+        return _project([row for row in rows if row is not None], row_type, fields, (key,))
+
+    def memory_usage(self):
+        rows = sum(len(offsets) - 1 for offsets, _ in self._rows.values())
+        return {
+            "rows": rows,
+            # Shared through the page cache; nothing per row is held by the worker
+            "mapped_bytes": self.size,
+            "bytes_per_row": self.size / rows if rows else 0.0,
+        }
+
+
+def _read(generation):
+    """Map ``catalog-<generation>.bin`` and return a ``MappedSnapshot`` over it."""
+    with open(_data_path(generation), "rb") as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    # The mapping is unmapped once the snapshot (and every view into it) is gone
+    return MappedSnapshot(generation, data)
+
+
+def _install(generation, snapshot):
+    global _generation
+    catalog.install(snapshot)
+    _generation = generation
+
+
+def publish(force=True):
+    """Build a snapshot from the database and publish it to every worker.
+
+    With ``force=False`` (worker start-up) an identical published snapshot
+    is reused instead of bumping the generation.
+    """
+    with _WriterLock():
+        db = SessionLocal()
+        try:
+            categories, examples, algorithms = catalog.load_rows(db)
+        finally:
+            db.close()
+        tables = {
+            "categories": sorted(categories, key=lambda row: (_key(row.order, int), row.id)),
+            "examples": sorted(examples, key=lambda row: row.id),
+            "algorithms": sorted(algorithms, key=lambda row: row.id),
+        }
+        directory_length, body, digest = _encode(tables)
+
+        current = shared_generation()
+        if not force and current and os.path.exists(_data_path(current)):
+            try:
+                snapshot = _read(current)
+            except ValueError:  # written by an older format; replace it
+                snapshot = None
+            if snapshot is not None and snapshot.digest == digest:
+                _install(current, snapshot)
+                return snapshot
+
+        generation = current + 1
+        tmp = _data_path(generation) + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, generation, directory_length, digest))
+            f.write(body)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, _data_path(generation))
+        control = _open_control()
+        CONTROL.pack_into(control, 0, generation)
+        control.flush()
+
+        # Keep the previous file for workers that are mid-remap
+        for path in glob.glob(_path("catalog-*.bin")):
+            if int(os.path.basename(path)[8:-4]) < generation - 1:
+                os.remove(path)
+
+    snapshot = _read(generation)
+    _install(generation, snapshot)
+    return snapshot
+
+
+def sync():
+    """Remap the shared snapshot if another worker published a newer generation."""
+    if shared_generation() == _generation:
+        return False
+    with _sync_lock:
+        generation = shared_generation()
+        if generation == _generation:
+            return False
+        _install(generation, _read(generation))
+    # We don't know which tables changed in the other worker
+    response_cache.clear()
+    return True
+
+
+class SharedCatalogMiddleware:
+    """Remaps the shared snapshot before a request if its generation moved."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and shared_generation() != _generation:
+            await run_in_threadpool(sync)
+        await self.app(scope, receive, send)
@@ -0,0 +1,29 @@
+from fastapi.responses import StreamingResponse
+
+from app import config
+from app.database import SessionLocal
+from app.serialization import dumps
+
+
+def ndjson_lines(fn, fields, *args):
+    """Yield the rows of ``fn(db, *args)`` as NDJSON, one chunk per batch.
+
+    The export owns its session: the response body is produced after the
+    route has returned, so the request-scoped one is already closed.
+    """
+    db = SessionLocal()
+    try:
+        batch = []
+        for row in fn(db, *args, fields):
+            batch.append(dumps(dict(zip(fields, row))))
+            if len(batch) == config.EXPORT_BATCH_SIZE:
+                yield b"\n".join(batch) + b"\n"
+                batch = []
+        if batch:
+            yield b"\n".join(batch) + b"\n"
+    finally:
+        db.close()
+
+
+def ndjson_response(fn, fields, *args):
+    return StreamingResponse(ndjson_lines(fn, fields, *args), media_type="application/x-ndjson")
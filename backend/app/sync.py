@@ -0,0 +1,106 @@
+import time
+
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import Session
+from app import models
+
+# Tables tracked by the change log, keyed by the entity name clients see
+SYNC_MODELS = {
+    "categories": models.Category,
+    "examples": models.Example,
+    "algorithms": models.Algorithm,
+}
+
+# The log holds one entry per row: its latest change. Triggers replace a
+# row's previous entry, so every write path (single-row handlers and bulk
+# statements alike) logs in its own transaction and the log never grows past
+# the number of rows plus tombstones. Versions come from AUTOINCREMENT, so
+# they only ever increase.
+_LOG_DDL = [
+    "CREATE TABLE change_log ("
+    "version INTEGER PRIMARY KEY AUTOINCREMENT, entity TEXT NOT NULL, row_id INTEGER NOT NULL, "
+    "op TEXT NOT NULL, changed_at INTEGER NOT NULL)",
+    "CREATE UNIQUE INDEX ix_change_log_row ON change_log (entity, row_id)",
+    # Highest version whose tombstone was compacted away
+    "CREATE TABLE change_log_floor (id INTEGER PRIMARY KEY CHECK (id = 1), version INTEGER NOT NULL)",
+    "INSERT INTO change_log_floor (id, version) VALUES (1, 0)",
+]
+
+def _log(table, op, ref):
+    return (
+        f"DELETE FROM change_log WHERE entity = '{table}' AND row_id = {ref}.id; "
+        f"INSERT INTO change_log (entity, row_id, op, changed_at) "
+        f"VALUES ('{table}', {ref}.id, '{op}', CAST(strftime('%s', 'now') AS INTEGER)); "
+    )
+
+def _ddl(table):
+    return [
+        f"CREATE TRIGGER {table}_changes_ai AFTER INSERT ON {table} BEGIN {_log(table, 'upsert', 'new')}END",
+        f"CREATE TRIGGER {table}_changes_au AFTER UPDATE ON {table} BEGIN {_log(table, 'upsert', 'new')}END",
+        f"CREATE TRIGGER {table}_changes_ad AFTER DELETE ON {table} BEGIN {_log(table, 'delete', 'old')}END",
+        # Backfill so a client syncing from version 0 receives every existing row
+        f"INSERT INTO change_log (entity, row_id, op, changed_at) "
+        f"SELECT '{table}', id, 'upsert', CAST(strftime('%s', 'now') AS INTEGER) FROM {table} ORDER BY id",
+    ]
+
+def create_change_log(connection):
+    """Create the change log and its triggers if missing, logging existing rows once."""
+    if "change_log" not in set(inspect(connection).get_table_names()):
+        for statement in _LOG_DDL:
+            connection.exec_driver_sql(statement)
+    triggers = {row[0] for row in connection.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    for table in SYNC_MODELS:
+        if f"{table}_changes_ai" not in triggers:
+            for statement in _ddl(table):
+                connection.exec_driver_sql(statement)
+
+def current_version(db: Session):
+    return db.execute(text("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'")).scalar() or 0
+
+def compact(db: Session, retention_seconds: float):
+    """Drop tombstones older than ``retention_seconds`` and raise the floor past them.
+
+    Clients whose version is below the floor may have missed a delete, so
+    they are told to reset instead of receiving a partial delta.
+    """
+    cutoff = int(time.time() - retention_seconds)
+    params = {"cutoff": cutoff}
+    version = db.execute(text("SELECT max(version) FROM change_log WHERE op = 'delete' AND changed_at < :cutoff"), params).scalar()
+    if version is None:
+        return 0
+    removed = db.execute(text("DELETE FROM change_log WHERE op = 'delete' AND changed_at < :cutoff"), params).rowcount
+    db.execute(text("UPDATE change_log_floor SET version = max(version, :version)"), {"version": version})
+    db.commit()
+    return removed
+
+def changes(db: Session, since: int, limit: int):
+    """Rows upserted and ids deleted after version ``since``, at most ``limit`` log entries.
+
+    The returned ``version`` is what the client passes as ``since`` next
+    time; ``has_more`` means it should call again straight away.
+    """
+    latest = current_version(db)
+    floor = db.execute(text("SELECT version FROM change_log_floor")).scalar()
+    reset = since < floor or since > latest
+    if reset:
+        since = 0
+
+    entries = db.execute(
+        text("SELECT version, entity, row_id, op FROM change_log WHERE version > :since ORDER BY version LIMIT :limit"),
+        {"since": since, "limit": limit + 1},
+    ).all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    # Not ``latest``: a write committed after that read must not be skipped.
+    # Never below the floor either, or a reset client would reset forever.
+    version = entries[-1].version if entries else since
+    if not has_more:
+        version = max(version, floor)
+    result = {"version": version, "reset": reset, "has_more": has_more}
+    for entity, model in SYNC_MODELS.items():
+        upserted = [entry.row_id for entry in entries if entry.entity == entity and entry.op == "upsert"]
+        deleted = [entry.row_id for entry in entries if entry.entity == entity and entry.op == "delete"]
+        rows = db.query(model).filter(model.id.in_(upserted)).order_by(model.id).all() if upserted else []
+        result[entity] = {"upserted": rows, "deleted": deleted}
+    return result
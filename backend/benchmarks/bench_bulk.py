@@ -0,0 +1,59 @@
+"""One-at-a-time ``crud.create_algorithm`` vs single-transaction ``crud.bulk_write``.
+
+Each mode loads the same rows into its own throwaway database, built by the
+real migrations so the FTS and change-log triggers add their cost too:
+
+    python -m benchmarks.bench_bulk --rows 5000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    os.environ["DSA_DATABASE_URL"] = f"sqlite:///{path}"
+    from app import crud, models, schemas
+    from app.database import SessionLocal, engine
+    from app.migrations import migrate
+
+    items = [
+        schemas.AlgorithmCreate(name=f"Algorithm {i}", slug=f"algorithm-{i}", category="sorting",
+                                python_code="def f(arr):\n    return sorted(arr)\n")
+        for i in range(args.rows)
+    ]
+
+    timings = {}
+    for mode in ("one-at-a-time", "bulk", "bulk upsert"):
+        engine.dispose()
+        for name in (path, f"{path}-wal", f"{path}-shm"):
+            if os.path.exists(name):
+                os.remove(name)
+        migrate(engine)
+        db = SessionLocal()
+        if mode == "bulk upsert":
+            # Half of the rows already exist, so this measures a mixed insert/update batch
+            crud.bulk_write(db, models.Algorithm, items[::2])
+        started = time.perf_counter()
+        if mode == "one-at-a-time":
+            for item in items:
+                crud.create_algorithm(db, item)
+        else:
+            results, errors = crud.bulk_write(db, models.Algorithm, items, upsert=mode == "bulk upsert")
+            assert not errors and len(results) == args.rows
+        timings[mode] = time.perf_counter() - started
+        db.close()
+
+    baseline = timings["one-at-a-time"]
+    print(f"{'mode':<14} {'seconds':>8} {'rows/s':>10} {'speedup':>8}")
+    for mode, seconds in timings.items():
+        print(f"{mode:<14} {seconds:>8.2f} {args.rows / seconds:>10.0f} {baseline / seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Database loads and latency for bursts of identical concurrent reads.
+
+Starts a server with the response cache disabled, so every request is a
+miss (like the moment after a write or TTL expiry), fires bursts of
+identical requests at once, and reads the load/coalesced counters from
+``/api/cache/stats``, with single-flight on and off:
+
+    python -m benchmarks.bench_coalescing --burst 200 --rounds 10
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks._server import percentile, running_server
+
+PATH = "/api/algorithms/slug/quick-sort"
+
+
+async def burst(client, size):
+    async def one():
+        started = time.perf_counter()
+        response = await client.get(PATH)
+        response.raise_for_status()
+        return time.perf_counter() - started
+
+    return await asyncio.gather(*(one() for _ in range(size)))
+
+
+async def run(base_url, size, rounds):
+    limits = httpx.Limits(max_connections=size, max_keepalive_connections=size)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await burst(client, 10)  # warm up
+        before = (await client.get("/api/cache/stats")).json()["coalescing"]
+        latencies = []
+        for _ in range(rounds):
+            latencies.extend(await burst(client, size))
+        after = (await client.get("/api/cache/stats")).json()["coalescing"]
+    return after["loads"] - before["loads"], after["coalesced"] - before["coalesced"], latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--burst", type=int, default=200, help="identical requests fired at once")
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    requests = args.burst * args.rounds
+    print(f"{'single-flight':<14} {'requests':>9} {'db loads':>9} {'coalesced':>10} {'p50 ms':>8} {'p99 ms':>8}")
+    for enabled in ("0", "1"):
+        env = {"DSA_SINGLE_FLIGHT": enabled, "DSA_CACHE_MAX_ENTRIES": "0"}
+        with running_server(env) as base_url:
+            loads, coalesced, latencies = asyncio.run(run(base_url, args.burst, args.rounds))
+        print(f"{'on' if enabled == '1' else 'off':<14} {requests:>9} {loads:>9} {coalesced:>10} "
+              f"{percentile(latencies, 50) * 1000:>8.1f} {percentile(latencies, 99) * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""CPU cost of on-the-fly compression vs serving precompressed cache entries.
+
+Fetches the catalog responses in-process from the seeded database, then
+times compressing each body per request (what a plain compression
+middleware does) against one compression per version plus lookups:
+
+    python -m benchmarks.bench_compression --requests 1000
+"""
+import argparse
+import gzip
+import time
+
+PATHS = [
+    "/api/algorithms/",
+    "/api/algorithms/slug/quick-sort",
+    "/api/algorithms/slug/merge-sort",
+    "/api/categories/",
+    "/api/categories/slug/sorting/full",
+]
+
+
+def cpu_seconds(fn, repeat):
+    started = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return time.process_time() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000, help="requests per path")
+    args = parser.parse_args()
+
+    from fastapi.testclient import TestClient
+    from app import compression
+    from main import app
+
+    client = TestClient(app)
+    bodies = {path: client.get(path, headers={"Accept-Encoding": "identity"}).content for path in PATHS}
+
+    # Typical on-the-fly settings vs the cache's precompression settings
+    on_the_fly = {"gzip": lambda body: gzip.compress(body, compresslevel=6)}
+    if compression.brotli is not None:
+        on_the_fly["br"] = lambda body: compression.brotli.compress(body, quality=5)
+
+    print(f"{'path':<36} {'coding':<6} {'bytes':>7} {'ratio':>6} {'on-the-fly ms':>14} {'precompressed ms':>17}")
+    total_fly = total_pre = 0.0
+    for path, body in bodies.items():
+        for coding, compress in on_the_fly.items():
+            fly = cpu_seconds(lambda: compress(body), args.requests)
+            variants = {}
+            pre = cpu_seconds(lambda: compression.compressed_body(variants, body, coding), args.requests)
+            total_fly += fly
+            total_pre += pre
+            ratio = len(body) / len(variants[coding])
+            print(f"{path:<36} {coding:<6} {len(body):>7} {ratio:>5.1f}x {fly * 1000:>14.1f} {pre * 1000:>17.1f}")
+    print(f"\nCPU for {args.requests} requests per path and coding: on-the-fly {total_fly:.2f}s, "
+          f"precompressed {total_pre:.2f}s, saved {total_fly - total_pre:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
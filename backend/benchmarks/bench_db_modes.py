@@ -0,0 +1,61 @@
+"""Throughput and latency of the sync (threadpool) and async (aiosqlite) DB modes.
+
+Run from the backend directory against a seeded database:
+
+    python -m benchmarks.bench_db_modes --clients 50 100 250 500
+
+The response cache and single-flight coalescing are disabled so every
+request makes its own trip to the database, and the query log is off so it
+doesn't add a threadpool hop to either mode.
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks._server import percentile, running_server
+
+PATHS = ["/api/algorithms/", "/api/algorithms/slug/bubble-sort", "/api/categories/", "/api/examples/"]
+
+
+async def _client(http, base_url, deadline, latencies):
+    i = 0
+    while time.monotonic() < deadline:
+        path = PATHS[i % len(PATHS)]
+        i += 1
+        started = time.perf_counter()
+        response = await http.get(base_url + path)
+        latencies.append(time.perf_counter() - started)
+        response.raise_for_status()
+
+
+async def load(base_url, clients, duration):
+    latencies = []
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as http:
+        deadline = time.monotonic() + duration
+        await asyncio.gather(*(_client(http, base_url, deadline, latencies) for _ in range(clients)))
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, nargs="+", default=[50, 100, 250, 500])
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    print(f"{'mode':<6} {'clients':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for mode in ("sync", "async"):
+        env = {"DSA_DB_MODE": mode, "DSA_CACHE_MAX_ENTRIES": "0", "DSA_SINGLE_FLIGHT": "0", "DSA_QUERY_LOG": "off"}
+        with running_server(env) as base_url:
+            for clients in args.clients:
+                latencies = asyncio.run(load(base_url, clients, args.duration))
+                print(
+                    f"{mode:<6} {clients:>7} {len(latencies) / args.duration:>9.1f} "
+                    f"{percentile(latencies, 50) * 1000:>8.1f} {percentile(latencies, 99) * 1000:>8.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Per-request overhead of the metrics middleware and SQL event hooks.
+
+Drives the app in-process (no sockets, so the difference isn't lost in
+network noise) and alternates rounds with metrics on and off:
+
+    python -m benchmarks.bench_metrics --requests 2000 --rounds 5
+
+The response cache and single-flight coalescing are disabled so every
+request runs its SQL and the statement hooks are exercised too, the query
+log is off so only the metrics hooks differ between rounds, and responses
+are requested uncompressed so brotli doesn't drown out the difference.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+PATHS = ["/api/algorithms/1", "/api/algorithms/slug/quick-sort?fields=name", "/api/categories/?limit=5", "/api/health"]
+
+
+async def timed_round(client, requests):
+    started = time.perf_counter()
+    for i in range(requests):
+        response = await client.get(PATHS[i % len(PATHS)], headers={"Accept-Encoding": "identity"})
+        response.raise_for_status()
+    return (time.perf_counter() - started) / requests
+
+
+async def run(requests, rounds):
+    import httpx
+    from app import metrics
+    from main import app
+
+    results = {True: [], False: []}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await timed_round(client, 200)  # warm up
+        for _ in range(rounds):
+            for enabled in (False, True):
+                metrics.enabled = enabled
+                results[enabled].append(await timed_round(client, requests))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000, help="requests per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ.update(DSA_CACHE_MAX_ENTRIES="0", DSA_SINGLE_FLIGHT="0", DSA_QUERY_LOG="off")
+    results = asyncio.run(run(args.requests, args.rounds))
+    off, on = min(results[False]), min(results[True])
+    print(f"{'metrics':<8} {'us/request':>11}")
+    print(f"{'off':<8} {off * 1e6:>11.1f}")
+    print(f"{'on':<8} {on * 1e6:>11.1f}")
+    print(f"\noverhead: {(on - off) * 1e6:.1f} us/request ({(on - off) / off:.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Page latency of offset vs keyset (cursor) pagination as the page depth grows.
+
+Builds a throwaway database with synthetic algorithms and walks it with
+``crud.get_algorithms`` in both modes:
+
+    python -m benchmarks.bench_pagination --rows 200000 --limit 100
+"""
+import argparse
+import os
+import tempfile
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    os.environ["DSA_DATABASE_URL"] = f"sqlite:///{path}"
+    from sqlalchemy import insert
+    from app import crud, models
+    from app.database import SessionLocal, engine
+    from app.migrations import migrate
+    from app.pagination import encode_cursor
+
+    migrate(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(models.Algorithm), [
+            {"name": f"Algorithm {i}", "slug": f"algorithm-{i}", "category": "sorting",
+             "python_code": "def f(arr):\n    return sorted(arr)\n" * 10}
+            for i in range(args.rows)
+        ])
+
+    db = SessionLocal()
+    print(f"{'depth':>9} {'offset ms':>10} {'cursor ms':>10}")
+    depth = args.limit
+    while depth < args.rows:
+        timings = []
+        for mode in ("offset", "cursor"):
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                if mode == "offset":
+                    rows = crud.get_algorithms(db, skip=depth, limit=args.limit)
+                else:
+                    # The cursor of the page ending at row ``depth`` (ids start at 1)
+                    rows = crud.get_algorithms(db, limit=args.limit, cursor=encode_cursor([depth]))
+                db.expunge_all()
+            timings.append((time.perf_counter() - started) / args.repeat * 1000)
+            assert rows[0].id == depth + 1
+        print(f"{depth:>9} {timings[0]:>10.2f} {timings[1]:>10.2f}")
+        depth *= 4
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
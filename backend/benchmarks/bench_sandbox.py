@@ -0,0 +1,84 @@
+"""Throughput of ``POST /api/algorithms/{slug}/run`` against the warm worker pool.
+
+Starts a server per pool size, keeps ``--concurrency`` runs in flight for
+``--seconds`` over a mix of sorts and searches on small inputs, and reports
+runs per second and latency. For comparison it also times starting a
+fresh ``python -I -S`` per run, the cost the pool keeps off each request:
+
+    python -m benchmarks.bench_sandbox --workers 1,2,4 --seconds 5
+"""
+import argparse
+import asyncio
+import random
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks._server import percentile, running_server
+
+
+def payloads(count):
+    rng = random.Random(7)
+    runs = []
+    for _ in range(count):
+        values = [rng.randrange(1000) for _ in range(50)]
+        slug = rng.choice(["bubble-sort", "insertion-sort", "merge-sort", "quick-sort", "binary-search"])
+        args = [sorted(values), values[0]] if slug == "binary-search" else [values]
+        runs.append((slug, {"args": args}))
+    return runs
+
+
+async def drive(base_url, concurrency, seconds):
+    runs = payloads(1000)
+    latencies, statuses = [], {}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        deadline = time.perf_counter() + seconds
+
+        async def loop(offset):
+            index = offset
+            while time.perf_counter() < deadline:
+                slug, body = runs[index % len(runs)]
+                index += concurrency
+                started = time.perf_counter()
+                response = await client.post(f"/api/algorithms/{slug}/run", json=body)
+                latencies.append(time.perf_counter() - started)
+                status = response.json()["status"] if response.status_code == 200 else f"http {response.status_code}"
+                statuses[status] = statuses.get(status, 0) + 1
+
+        for slug, body in runs[:20]:  # warm up: every worker compiles and caches the code
+            await client.post(f"/api/algorithms/{slug}/run", json=body)
+        started = time.perf_counter()
+        await asyncio.gather(*(loop(offset) for offset in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return len(latencies) / elapsed, latencies, statuses
+
+
+def cold_runs_per_second(count=20):
+    started = time.perf_counter()
+    for _ in range(count):
+        subprocess.run([sys.executable, "-I", "-S", "-c", "pass"], check=True)
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated pool sizes")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'runs/s':>8} {'p50 ms':>8} {'p99 ms':>8}  statuses")
+    for size in args.workers.split(","):
+        env = {"DSA_SANDBOX_WORKERS": size, "DSA_QUERY_LOG": "off"}
+        with running_server(env) as base_url:
+            rate, latencies, statuses = asyncio.run(drive(base_url, args.concurrency, args.seconds))
+        print(f"{size:>8} {rate:>8.0f} {percentile(latencies, 50) * 1000:>8.1f} "
+              f"{percentile(latencies, 99) * 1000:>8.1f}  {statuses}")
+    print(f"\nfresh interpreter per run (no pool): {cold_runs_per_second():.0f} runs/s at best")
+
+
+if __name__ == "__main__":
+    main()
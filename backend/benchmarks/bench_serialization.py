@@ -0,0 +1,56 @@
+"""Requests/sec of list endpoints with pydantic validation vs the fast row-tuple path.
+
+Runs the app in-process against a throwaway database with the response
+cache disabled, so every request queries and serializes:
+
+    python -m benchmarks.bench_serialization --sizes 100 1000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    os.environ["DSA_DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    os.environ["DSA_CACHE_MAX_ENTRIES"] = "0"
+    from fastapi.testclient import TestClient
+    from sqlalchemy import insert
+    from app import config, models, serialization
+    from app.database import engine
+    from app.migrations import migrate
+    from main import app
+
+    migrate(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(models.Algorithm), [
+            {"name": f"Algorithm {i}", "slug": f"algorithm-{i}", "category": "sorting",
+             "description": "Synthetic benchmark row", "explanation": "Explained " * 50,
+             "python_code": "def f(arr):\n    return sorted(arr)\n" * 10,
+             "time_complexity_best": "O(n)", "time_complexity_worst": "O(n²)"}
+            for i in range(max(args.sizes))
+        ])
+
+    encoder = "orjson" if serialization.orjson is not None else "json"
+    client = TestClient(app)
+    print(f"{'rows':>6} {'validated req/s':>16} {f'fast ({encoder}) req/s':>20} {'speedup':>8}")
+    for size in args.sizes:
+        rates = []
+        for fast in (False, True):
+            config.FAST_SERIALIZATION = fast
+            requests = 0
+            deadline = time.perf_counter() + args.duration
+            while time.perf_counter() < deadline:
+                client.get(f"/api/algorithms/?limit={size}").raise_for_status()
+                requests += 1
+            rates.append(requests / args.duration)
+        print(f"{size:>6} {rates[0]:>16.1f} {rates[1]:>20.1f} {rates[1] / rates[0]:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
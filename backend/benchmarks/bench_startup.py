@@ -0,0 +1,71 @@
+"""Cold-start time: process spawn to ready and to the first catalog response.
+
+Starts uvicorn repeatedly in each startup mode and polls until
+``/api/ready`` answers 200 and until a catalog route returns its first
+response:
+
+    python -m benchmarks.bench_startup --runs 5
+
+Run ``python -m app.migrations`` first; the fast mode only checks the
+schema version.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks._server import BACKEND_DIR, free_port, percentile
+
+FIRST_REQUEST = "/api/algorithms/slug/quick-sort"
+
+
+def wait_for(url, started, deadline):
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.TransportError:
+            pass
+        time.sleep(0.005)
+    raise RuntimeError(f"{url} did not answer 200")
+
+
+def cold_start(mode):
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=dict(os.environ, DSA_STARTUP_MODE=mode),
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 60
+        ready = wait_for(base_url + "/api/ready", started, deadline)
+        first = wait_for(base_url + FIRST_REQUEST, started, deadline)
+        return ready, first
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'mode':<6} {'ready p50 ms':>13} {'first response p50 ms':>22} {'max ms':>8}")
+    for mode in ("full", "fast"):
+        samples = [cold_start(mode) for _ in range(args.runs)]
+        ready = [sample[0] for sample in samples]
+        first = [sample[1] for sample in samples]
+        print(f"{mode:<6} {percentile(ready, 50) * 1000:>13.0f} {percentile(first, 50) * 1000:>22.0f} "
+              f"{max(first) * 1000:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
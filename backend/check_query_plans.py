@@ -0,0 +1,118 @@
+"""Fail when a read route's SQL falls back to a table scan or an unindexed sort.
+
+Calls every read route through the app with the response cache off,
+captures the SELECTs it runs and checks their EXPLAIN QUERY PLAN:
+
+    python check_query_plans.py
+
+A filtered query must search an index (``SCAN t`` is a full table scan),
+and no ORDER BY may need a temp b-tree. Unfiltered list pages may walk the
+table in rowid order; they stop after ``limit`` rows. Exits non-zero on
+any violation, so it can gate CI after a schema or query change.
+"""
+import os
+import re
+import sys
+
+os.environ.setdefault("DSA_CACHE_MAX_ENTRIES", "0")
+os.environ["DSA_CATALOG_MODE"] = "database"
+os.environ["DSA_QUERY_LOG"] = "off"
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.database import engine
+from app.querylog import explain, statement_shape
+from main import app
+
+# Plans that can't be served by an index, with the reason
+ALLOWED = {
+    "/api/search/": "results are ranked by bm25 score, which no index can order",
+}
+
+
+def routes(client):
+    """Read routes with every filter, sort and lookup the routers support."""
+    def cursor(path):
+        return client.get(path).headers["X-Next-Cursor"]
+
+    return [
+        "/api/categories/?limit=5",
+        f"/api/categories/?limit=5&cursor={cursor('/api/categories/?limit=2')}",
+        "/api/categories/1",
+        "/api/categories/slug/sorting",
+        "/api/categories/slug/sorting/full",
+        "/api/examples/?limit=5",
+        f"/api/examples/?limit=5&cursor={cursor('/api/examples/?limit=1')}",
+        "/api/examples/?category_id=1",
+        "/api/examples/?category_id=1&summary=true",
+        "/api/examples/1",
+        "/api/examples/slug/dynamic-array",
+        "/api/examples/export?category_id=1",
+        "/api/algorithms/?limit=5",
+        f"/api/algorithms/?limit=5&cursor={cursor('/api/algorithms/?limit=2')}",
+        "/api/algorithms/?category=sorting",
+        "/api/algorithms/?category=sorting&summary=true",
+        f"/api/algorithms/?category=sorting&limit=5&cursor={cursor('/api/algorithms/?category=sorting&limit=2')}",
+        "/api/algorithms/1",
+        "/api/algorithms/slug/quick-sort",
+        "/api/algorithms/export?category=sorting",
+        "/api/search/?q=sort",
+        "/api/sync/?since=0",
+    ]
+
+
+def violations(statement, plan):
+    problems = []
+    filtered = re.search(r"\bWHERE\b", statement, re.IGNORECASE)
+    for line in plan:
+        if "USE TEMP B-TREE" in line:
+            problems.append(line)
+        elif filtered and re.match(r"SCAN \w+$", line) and not line.startswith("SCAN sqlite_"):
+            problems.append(line)
+    return problems
+
+
+def main():
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip()[:6].upper() == "SELECT":
+            captured.append((statement, parameters))
+
+    client = TestClient(app)
+    client.__enter__()  # run the startup tasks (migrations)
+    paths = routes(client)
+    event.listen(engine, "before_cursor_execute", capture)
+
+    failures = 0
+    for path in paths:
+        del captured[:]
+        response = client.get(path)
+        if response.status_code != 200:
+            print(f"ERROR {path}: HTTP {response.status_code}")
+            failures += 1
+            continue
+        seen = set()
+        for statement, parameters in captured:
+            shape = statement_shape(statement)
+            if shape in seen:
+                continue
+            seen.add(shape)
+            plan = explain(statement, parameters)
+            problems = violations(statement, plan)
+            route = path.split("?")[0]
+            if problems and route in ALLOWED:
+                print(f"allowed {path}: {'; '.join(problems)} ({ALLOWED[route]})")
+            elif problems:
+                failures += 1
+                print(f"FAIL {path}\n  {shape}\n  " + "\n  ".join(plan))
+            else:
+                print(f"ok   {path}: {'; '.join(plan)}")
+
+    print(f"\n{failures} violation(s)" if failures else "\nAll route queries use indexes")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""Import and export catalog content packs.
+
+A pack is a gzip-compressed stream of JSON lines: a header, then the
+categories, examples and algorithms, each either one row per line
+(``--layout rows``) or in chunks of columns (``--layout columns``, smaller
+once compressed because similar values sit next to each other). Examples
+reference their category by ``category_slug`` so packs move between
+databases. Both directions stream in chunks, so memory stays flat however
+large the pack is, and importing upserts by slug and skips rows that already
+match, so re-importing a pack is idempotent and writes nothing it needn't.
+
+    python content_pack.py export pack.jsonl.gz [--layout columns]
+    python content_pack.py import pack.jsonl.gz
+"""
+import argparse
+import gzip
+import json
+import sys
+import time
+
+from app import config, crud, models, schemas
+from app.database import SessionLocal, engine
+from app.migrations import migrate
+from app.serialization import dumps
+
+FORMAT = "dsa-content-pack"
+VERSION = 1
+CHUNK_SIZE = crud.BULK_CHUNK_SIZE
+
+CATEGORY_FIELDS = tuple(schemas.CategoryCreate.model_fields)
+EXAMPLE_FIELDS = tuple(name if name != "category_id" else "category_slug" for name in schemas.ExampleCreate.model_fields)
+ALGORITHM_FIELDS = tuple(schemas.AlgorithmCreate.model_fields)
+
+# Table name -> (model, create schema, pack fields), in dependency order
+TABLES = {
+    "categories": (models.Category, schemas.CategoryCreate, CATEGORY_FIELDS),
+    "examples": (models.Example, schemas.ExampleCreate, EXAMPLE_FIELDS),
+    "algorithms": (models.Algorithm, schemas.AlgorithmCreate, ALGORITHM_FIELDS),
+}
+
+
+def _rows(db, table):
+    """Row tuples in pack field order, fetched in server-side batches."""
+    if table == "examples":
+        columns = [models.Category.slug if name == "category_slug" else getattr(models.Example, name)
+                   for name in EXAMPLE_FIELDS]
+        query = db.query(*columns).outerjoin(models.Category, models.Example.category_id == models.Category.id)
+        query = query.order_by(models.Example.id)
+    else:
+        model, _, fields = TABLES[table]
+        query = db.query(*(getattr(model, name) for name in fields)).order_by(model.id)
+    return query.execution_options(yield_per=CHUNK_SIZE)
+
+
+def _chunks(rows):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def export_pack(path, layout="rows"):
+    """Write every catalog row to ``path``; returns rows written per table."""
+    counts = {}
+    db = SessionLocal()
+    try:
+        with gzip.open(path, "wb", compresslevel=config.GZIP_LEVEL) as out:
+            out.write(dumps({"format": FORMAT, "version": VERSION, "layout": layout}) + b"\n")
+            for table, (_, _, fields) in TABLES.items():
+                counts[table] = 0
+                for chunk in _chunks(_rows(db, table)):
+                    if layout == "columns":
+                        columns = {name: [row[index] for row in chunk] for index, name in enumerate(fields)}
+                        out.write(dumps({"table": table, "columns": columns}) + b"\n")
+                    else:
+                        out.write(b"".join(dumps({"table": table, "row": dict(zip(fields, row))}) + b"\n" for row in chunk))
+                    counts[table] += len(chunk)
+    finally:
+        db.close()
+    return counts
+
+
+def read_pack(path):
+    """Yield ``(table, row dict)`` pairs from a pack in either layout."""
+    with gzip.open(path, "rb") as pack:
+        header = json.loads(pack.readline())
+        if header.get("format") != FORMAT or header.get("version") != VERSION:
+            raise ValueError(f"{path} is not a {FORMAT} v{VERSION} file")
+        for line in pack:
+            record = json.loads(line)
+            if "row" in record:
+                yield record["table"], record["row"]
+            else:
+                columns = record["columns"]
+                names = list(columns)
+                for values in zip(*(columns[name] for name in names)):
+                    yield record["table"], dict(zip(names, values))
+
+
+def _category_ids(db, slugs):
+    return dict(db.query(models.Category.slug, models.Category.id).filter(models.Category.slug.in_(set(slugs))).all())
+
+
+class PackError(Exception):
+    pass
+
+
+def _unchanged(db, model, items):
+    """Slugs of ``items`` whose stored row already has exactly their values."""
+    fields = list(items[0].model_fields)
+    stored = db.query(*(getattr(model, name) for name in fields)).filter(model.slug.in_([item.slug for item in items]))
+    stored = {row.slug: tuple(row) for row in stored}
+    return {item.slug for item in items if stored.get(item.slug) == tuple(getattr(item, name) for name in fields)}
+
+
+def _flush(db, table, rows):
+    """Upsert one chunk; returns ``(created, unchanged)``."""
+    model, schema, _ = TABLES[table]
+    if table == "examples":
+        # Examples without a category are exported with a null slug
+        ids = _category_ids(db, [row["category_slug"] for row in rows if row["category_slug"] is not None])
+        missing = sorted(map(str, {row["category_slug"] for row in rows} - set(ids) - {None}))
+        if missing:
+            raise PackError(f"examples reference unknown categories: {', '.join(missing)}")
+        rows = [{**{key: value for key, value in row.items() if key != "category_slug"},
+                 "category_id": ids.get(row["category_slug"])} for row in rows]
+    items = [schema(**row) for row in rows]
+    # Rewriting an identical row would still fire the change-log and FTS triggers
+    unchanged = _unchanged(db, model, items)
+    items = [item for item in items if item.slug not in unchanged]
+    if not items:
+        return 0, len(unchanged)
+    results, errors = crud.bulk_write(db, model, items, upsert=True)
+    if errors:
+        raise PackError(f"{table}: {errors}")
+    return sum(1 for result in results if result["status"] == "created"), len(unchanged)
+
+
+def _add(count, chunk, flushed):
+    count[0] += len(chunk)
+    count[1] += flushed[0]
+    count[2] += flushed[1]
+
+
+def import_pack(path):
+    """Upsert every row of the pack by slug, one transaction per chunk.
+
+    Returns ``{table: (rows, created, unchanged)}``. Chunks already
+    committed stay committed if a later one fails; re-running the import is
+    safe.
+    """
+    counts = {table: [0, 0, 0] for table in TABLES}
+    db = SessionLocal()
+    try:
+        table, chunk = None, []
+        for row_table, row in read_pack(path):
+            if row_table not in TABLES:
+                raise PackError(f"unknown table {row_table!r}")
+            if chunk and (row_table != table or len(chunk) == CHUNK_SIZE):
+                _add(counts[table], chunk, _flush(db, table, chunk))
+                chunk = []
+            table = row_table
+            chunk.append(row)
+        if chunk:
+            _add(counts[table], chunk, _flush(db, table, chunk))
+    finally:
+        db.close()
+    return {table: tuple(count) for table, count in counts.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import or export catalog content packs")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="write the catalog to a pack")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--layout", choices=("rows", "columns"), default="rows")
+    import_parser = commands.add_parser("import", help="upsert a pack into the catalog")
+    import_parser.add_argument("path")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.command == "export":
+        counts = export_pack(args.path, args.layout)
+        total = sum(counts.values())
+        summary = ", ".join(f"{count} {table}" for table, count in counts.items())
+    else:
+        migrate(engine)
+        try:
+            counts = import_pack(args.path)
+        except (PackError, ValueError) as exc:
+            print(f"Import failed: {exc}", file=sys.stderr)
+            sys.exit(1)
+        total = sum(rows for rows, _, _ in counts.values())
+        summary = ", ".join(f"{rows} {table} ({created} new, {unchanged} unchanged)"
+                            for table, (rows, created, unchanged) in counts.items())
+    elapsed = time.perf_counter() - started
+    print(f"{args.command.capitalize()}ed {summary} in {elapsed:.2f}s ({total / elapsed if elapsed else 0:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
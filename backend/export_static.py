@@ -0,0 +1,162 @@
+"""Export the catalog API responses as static JSON files for CDN/edge serving.
+
+Every list, id and slug response is written under ``<out>/api/...`` exactly
+as the API would return it without query parameters (lists hold the first
+``API_LIST_LIMIT`` rows, like the routes' default ``?limit=``), together
+with ``.gz`` (and, with the optional ``brotli`` package, ``.br``) variants
+and a ``manifest.json`` of sha256 content hashes. Re-running only rewrites
+files whose content changed and removes files for rows that no longer exist,
+and ``.br`` files an earlier run left when brotli is no longer installed.
+
+    python export_static.py --out static_export
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from typing import List
+from urllib.parse import quote
+
+from app import crud, schemas
+from app.compression import brotli
+from app.database import SessionLocal
+from app.serialization import query_fields, response_encoder, schema_encoder
+
+MANIFEST = "manifest.json"
+# The list routes' default ?limit=
+API_LIST_LIMIT = 100
+
+
+def _list(db, schema, fn, *args):
+    rows = fn(db, 0, API_LIST_LIMIT, *args, None, query_fields(schema, None))
+    return response_encoder(schema, None, many=True)(rows)
+
+
+def _one(db, schema, fn, key):
+    return response_encoder(schema, None)(fn(db, key, query_fields(schema, None)))
+
+
+def _segment(value):
+    # Slugs and categories are free text: keep each one a single, literal path segment
+    segment = quote(str(value), safe="")
+    return segment.replace(".", "%2E") if segment in (".", "..") else segment
+
+
+def _resolve(out_dir, relative):
+    """Absolute path of ``relative`` under ``out_dir``; refuses anything that escapes it."""
+    root = os.path.realpath(out_dir)
+    path = os.path.realpath(os.path.join(root, relative))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"{relative!r} resolves outside {out_dir}")
+    return path
+
+
+def build_files(db):
+    """Map of relative path -> JSON body for every exported response."""
+    files = {}
+    categories = crud.get_categories(db, 0, None)
+    examples = crud.get_examples(db, 0, None)
+    algorithms = crud.get_algorithms(db, 0, None)
+
+    files["api/categories/index.json"] = _list(db, schemas.Category, crud.get_categories)
+    for category in categories:
+        files[f"api/categories/{category.id}.json"] = _one(db, schemas.Category, crud.get_category, category.id)
+        files[f"api/categories/slug/{_segment(category.slug)}.json"] = _one(db, schemas.Category, crud.get_category_by_slug, category.slug)
+        page = crud.get_category_page(db, category.slug)
+        files[f"api/categories/slug/{_segment(category.slug)}/full.json"] = schema_encoder(schemas.CategoryPage)(page)
+
+    files["api/examples/index.json"] = _list(db, schemas.Example, crud.get_examples, None)
+    files["api/examples/summary.json"] = schema_encoder(List[schemas.ExampleSummary])(
+        crud.get_examples(db, 0, API_LIST_LIMIT, None, None, crud.EXAMPLE_SUMMARY_FIELDS))
+    for category_id in sorted({example.category_id for example in examples if example.category_id}):
+        files[f"api/examples/category/{category_id}.json"] = _list(db, schemas.Example, crud.get_examples, category_id)
+    for example in examples:
+        files[f"api/examples/{example.id}.json"] = _one(db, schemas.Example, crud.get_example, example.id)
+        files[f"api/examples/slug/{_segment(example.slug)}.json"] = _one(db, schemas.Example, crud.get_example_by_slug, example.slug)
+
+    files["api/algorithms/index.json"] = _list(db, schemas.Algorithm, crud.get_algorithms, None)
+    files["api/algorithms/summary.json"] = schema_encoder(List[schemas.AlgorithmSummary])(
+        crud.get_algorithms(db, 0, API_LIST_LIMIT, None, None, crud.ALGORITHM_SUMMARY_FIELDS))
+    for category in sorted({algorithm.category for algorithm in algorithms if algorithm.category}):
+        files[f"api/algorithms/category/{_segment(category)}.json"] = _list(db, schemas.Algorithm, crud.get_algorithms, category)
+    for algorithm in algorithms:
+        files[f"api/algorithms/{algorithm.id}.json"] = _one(db, schemas.Algorithm, crud.get_algorithm, algorithm.id)
+        files[f"api/algorithms/slug/{_segment(algorithm.slug)}.json"] = _one(db, schemas.Algorithm, crud.get_algorithm_by_slug, algorithm.slug)
+    return files
+
+
+def _variants(body):
+    variants = {"": body, ".gz": gzip.compress(body, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(body, quality=11)
+    return variants
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def export(out_dir, force=False):
+    manifest_path = os.path.join(out_dir, MANIFEST)
+    previous = {}
+    if os.path.exists(manifest_path) and not force:
+        with open(manifest_path) as f:
+            previous = json.load(f)["files"]
+
+    db = SessionLocal()
+    try:
+        files = build_files(db)
+    finally:
+        db.close()
+
+    manifest, written = {}, 0
+    for relative, body in sorted(files.items()):
+        digest = hashlib.sha256(body).hexdigest()
+        entry = previous.get(relative)
+        # Also rewritten when brotli was installed or removed since the last run
+        if (entry and entry["sha256"] == digest and ("br_bytes" in entry) == (brotli is not None)
+                and os.path.exists(_resolve(out_dir, relative))):
+            manifest[relative] = entry
+            continue
+        variants = _variants(body)
+        for suffix, data in variants.items():
+            _write(_resolve(out_dir, relative + suffix), data)
+        stale = _resolve(out_dir, relative + ".br")
+        if brotli is None and os.path.exists(stale):
+            os.remove(stale)
+        manifest[relative] = {"sha256": digest, "bytes": len(body),
+                              **{f"{suffix[1:]}_bytes": len(data) for suffix, data in variants.items() if suffix}}
+        written += 1
+
+    removed = 0
+    for relative in set(previous) - set(manifest):
+        for suffix in ("", ".gz", ".br"):
+            try:
+                path = _resolve(out_dir, relative + suffix)
+            except ValueError as exc:  # a manifest written before slugs were quoted, or edited by hand
+                print(f"Not removing {exc}")
+                continue
+            if os.path.exists(path):
+                os.remove(path)
+        removed += 1
+
+    _write(manifest_path, json.dumps({
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "files": manifest,
+    }, indent=2, sort_keys=True).encode())
+    print(f"Exported {len(manifest)} responses to {out_dir}: {written} written, "
+          f"{len(manifest) - written} unchanged, {removed} removed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the catalog as static JSON files")
+    parser.add_argument("--out", default="static_export", help="output directory")
+    parser.add_argument("--force", action="store_true", help="rewrite every file, ignoring the previous manifest")
+    args = parser.parse_args()
+    export(args.out, args.force)
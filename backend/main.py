@@ -1,10 +1,20 @@
+import asyncio
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base
-from app.api import categories, examples, algorithms
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.concurrency import run_in_threadpool
+from app.database import engine, SessionLocal, close_engines, startup_report
+from app import config
+from app import metrics
+from app.cache import response_cache, single_flight
+from app.compression import compression_stats
+from app.routers import LazyRouters, LazyRoutersMiddleware, include_all
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Set once the startup tasks are done; /api/ready reports it
+readiness = {"ready": False, "detail": "starting", "schema_behind": False}
+# Serialises /api/ready's re-check of a schema that was behind at startup
+schema_recheck = asyncio.Lock()
 
 app = FastAPI(
     title="DSA Learning Platform API",
@@ -12,6 +22,10 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# On-the-fly gzip for responses that aren't cached; cached catalog responses
+# arrive precompressed and are passed through untouched
+app.add_middleware(GZipMiddleware, minimum_size=config.COMPRESSION_MIN_SIZE, compresslevel=6)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -19,12 +33,121 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
-# Include routers
-app.include_router(categories.router, prefix="/api/categories", tags=["categories"])
-app.include_router(examples.router, prefix="/api/examples", tags=["examples"])
-app.include_router(algorithms.router, prefix="/api/algorithms", tags=["algorithms"])
+# Pick up snapshots published by other workers before serving a request
+if config.CATALOG_MODE == "shared":
+    from app.shared_catalog import SharedCatalogMiddleware
+    app.add_middleware(SharedCatalogMiddleware)
+
+# Slow-request / N+1 log; inside the metrics middleware so its EXPLAINs
+# aren't timed as part of the request
+if config.QUERY_LOG != "off":
+    from app.querylog import QueryLogMiddleware
+    app.add_middleware(QueryLogMiddleware)
+
+# Outermost, so latency and sizes cover the whole stack as the client sees it
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Include routers; the fast startup mode imports each on first use instead
+lazy_routers = None
+if config.STARTUP_MODE == "fast":
+    lazy_routers = LazyRouters(app)
+    app.add_middleware(LazyRoutersMiddleware, routers=lazy_routers)
+else:
+    include_all(app)
+
+def schema_version():
+    from app import migrations
+
+    with engine.connect() as connection:
+        return migrations.current_version(connection), migrations.LATEST
+
+@app.on_event("startup")
+async def prepare_schema():
+    from app import migrations
+
+    if config.STARTUP_MODE == "fast":
+        # Migrations are a deploy step (python -m app.migrations); only check the version
+        version, latest = await run_in_threadpool(schema_version)
+        if version < latest:
+            readiness.update(schema_behind=True, detail=f"schema version {version} is behind {latest}; run python -m app.migrations")
+            print("Not ready:", readiness["detail"])
+    else:
+        await run_in_threadpool(migrations.migrate, engine, True)
+
+@app.on_event("startup")
+async def report_database_settings():
+    report = await startup_report()
+    print("Database settings:", ", ".join(f"{key}={value}" for key, value in report.items()))
+
+async def compact_change_log():
+    from app.sync import compact
+
+    def run():
+        db = SessionLocal()
+        try:
+            return compact(db, config.SYNC_TOMBSTONE_RETENTION_DAYS * 86400)
+        finally:
+            db.close()
+
+    removed = await run_in_threadpool(run)
+    if removed:
+        print(f"Change log compacted: {removed} tombstones removed")
+
+async def load_catalog():
+    if config.CATALOG_MODE == "memory":
+        from app import catalog
+
+        snapshot = await run_in_threadpool(catalog.refresh)
+        print("Catalog snapshot loaded:", snapshot.memory_usage())
+    elif config.CATALOG_MODE == "shared":
+        from app import shared_catalog
+        snapshot = await run_in_threadpool(shared_catalog.publish, False)
+        print(f"Shared catalog snapshot {snapshot.version} mapped:", snapshot.memory_usage())
+
+@app.on_event("startup")
+async def prepare_data():
+    # Both need the tables; with the schema behind, /api/ready runs them once it has caught up
+    if readiness["schema_behind"]:
+        return
+    await compact_change_log()
+    await load_catalog()
+
+@app.on_event("startup")
+async def start_sandbox():
+    if config.SANDBOX_WORKERS <= 0:
+        return
+    from app.sandbox import pool
+
+    if config.STARTUP_MODE == "fast":
+        # Warm the workers in the background; runs wait for the first free one
+        asyncio.get_running_loop().create_task(pool.start())
+    else:
+        await pool.start()
+        if pool.started:
+            print(f"Sandbox pool started: {pool.size} workers")
+        else:
+            print("Sandbox pool disabled: workers could not confine themselves (see the dsa.sandbox log)")
+
+@app.on_event("shutdown")
+async def stop_sandbox():
+    if config.SANDBOX_WORKERS > 0:
+        from app.sandbox import pool
+        await pool.close()
+
+@app.on_event("shutdown")
+async def close_database():
+    await close_engines()
+
+@app.on_event("startup")
+async def mark_ready():
+    if readiness["detail"] == "starting":
+        readiness.update(ready=True, detail="ready")
+    if lazy_routers is not None:
+        # Warm the routers in the background so first requests rarely wait
+        asyncio.get_running_loop().create_task(lazy_routers.load_all())
 
 @app.get("/")
 def root():
@@ -34,6 +157,47 @@ def root():
 def health_check():
     return {"status": "healthy"}
 
+async def recheck_schema():
+    async with schema_recheck:
+        if not readiness["schema_behind"]:
+            return
+        version, latest = await run_in_threadpool(schema_version)
+        if version < latest:
+            return
+        readiness["schema_behind"] = False
+        await prepare_data()
+        readiness.update(ready=True, detail="ready")
+        print("Ready: schema migrated to version", version)
+
+@app.get("/api/ready")
+async def readiness_check():
+    # Liveness is /api/health; this one says whether to route traffic here yet
+    if readiness["schema_behind"]:
+        await recheck_schema()
+    status = 200 if readiness["ready"] else 503
+    return JSONResponse({"status": "ready" if readiness["ready"] else "not ready", "detail": readiness["detail"]}, status_code=status)
+
+@app.get("/api/cache/stats")
+def cache_stats():
+    return {**response_cache.stats(), "compression": compression_stats.snapshot(), "coalescing": single_flight.stats()}
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/catalog/stats")
+def catalog_stats():
+    from app import catalog
+
+    snapshot = catalog.current()
+    if snapshot is None:
+        return {"mode": config.CATALOG_MODE}
+    stats = {"mode": config.CATALOG_MODE, "version": snapshot.version, "loaded_at": snapshot.loaded_at, **snapshot.memory_usage()}
+    if config.CATALOG_MODE == "shared":
+        from app.shared_catalog import shared_generation
+        stats["shared_generation"] = shared_generation()
+    return stats
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -1,12 +1,12 @@
 from sqlalchemy.orm import Session
-from app.database import SessionLocal, Base, engine
+from app.database import SessionLocal, engine
+from app.migrations import migrate
 from app.models import Category, Example, Algorithm, CategoryType, DifficultyLevel
 import json
 
-# Create tables
-Base.metadata.create_all(bind=engine)
 
 def seed_database():
+    migrate(engine, verbose=True)
     db = SessionLocal()
     
     try:
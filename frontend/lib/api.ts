@@ -13,6 +13,12 @@ export async function fetchCategoryBySlug(slug: string) {
   return response.json();
 }
 
+export async function fetchCategoryPage(slug: string) {
+  const response = await fetch(`${API_BASE_URL}/categories/slug/${slug}/full`);
+  if (!response.ok) throw new Error("Failed to fetch category");
+  return response.json();
+}
+
 export async function fetchExamples(categoryId?: number) {
   const url = categoryId
     ? `${API_BASE_URL}/examples?category_id=${categoryId}`
@@ -44,3 +50,33 @@ export async function fetchAlgorithmBySlug(slug: string) {
   if (!response.ok) throw new Error("Failed to fetch algorithm");
   return response.json();
 }
+
+export async function fetchAlgorithmsBySlugs(slugs: string[]) {
+  const response = await fetch(`${API_BASE_URL}/algorithms/batch`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ slugs }),
+  });
+  if (!response.ok) throw new Error("Failed to fetch algorithms");
+  return response.json();
+}
+
+export async function fetchExamplesBySlugs(slugs: string[]) {
+  const response = await fetch(`${API_BASE_URL}/examples/batch`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ slugs }),
+  });
+  if (!response.ok) throw new Error("Failed to fetch examples");
+  return response.json();
+}
+
+export async function fetchCategoriesBySlugs(slugs: string[]) {
+  const response = await fetch(`${API_BASE_URL}/categories/batch`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ slugs }),
+  });
+  if (!response.ok) throw new Error("Failed to fetch categories");
+  return response.json();
+}